@@ -3,44 +3,89 @@ Hushful RAG Dashboard
 Web interface for managing ChromaDB knowledge base + Socratic expert dialogue
 """
 import os
+import hashlib
+import hmac
 import logging
-from functools import wraps
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache, wraps
+from typing import Optional
+import orjson
+from flask import (
+    Flask, render_template, request, jsonify, session, redirect, url_for, g,
+    stream_with_context
+)
+from flask.typing import ResponseReturnValue
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 
-from chroma_client import ChromaManager
-from services import DocumentExtractor, URLExtractor, Summarizer
-from services.dialogue_service import SocraticDialogue
-
+# Load .env before importing services, which read their settings at import
 load_dotenv()
 
+# Service classes (chromadb, google-genai, anthropic, parsers) are imported
+# inside their getters so worker boot doesn't pay for the SDK imports
+from services import cache as response_cache
+from services.text_utils import word_count
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "dev-secret-key")
 
+# Trust X-Forwarded-For only for the proxies in front of us (Render: 1), so
+# request.remote_addr is the real client and can't be spoofed by a header
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+if TRUSTED_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
 # Configure upload limits (50MB max)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
 
-# Initialize services
+# Server-side sessions in Redis when available, so any worker/instance can
+# serve any user; otherwise Flask's signed-cookie sessions
+if response_cache.get_redis() is not None:
+    from flask_session import Session
+
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = response_cache.get_redis()
+    Session(app)
+
+# Initialize services (lazily, on first use)
 chroma_manager = None
-document_extractor = DocumentExtractor()
-url_extractor = URLExtractor()
+document_extractor = None
+url_extractor = None
 summarizer = None
 dialogue_service = None
 
 
+def ojsonify(obj, status=200):
+    """jsonify() backed by orjson, for endpoints returning large text payloads."""
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype="application/json"
+    )
+
+
+# Guards lazy service creation: gunicorn threads can race on the first requests
+_services_lock = threading.Lock()
+
+
 def get_chroma():
     """Get or create ChromaDB manager (retries on failure)."""
     global chroma_manager
     if chroma_manager is None:
-        try:
-            chroma_manager = ChromaManager()
-        except Exception as e:
-            logger.error(f"ChromaDB connection failed: {e}")
-            raise
+        with _services_lock:
+            if chroma_manager is None:
+                try:
+                    from chroma_client import get_chroma_manager
+                    chroma_manager = get_chroma_manager()
+                except Exception as e:
+                    logger.error(f"ChromaDB connection failed: {e}")
+                    raise
     return chroma_manager
 
 
@@ -48,7 +93,10 @@ def get_summarizer():
     """Get or create Summarizer instance (lazy initialization)."""
     global summarizer
     if summarizer is None:
-        summarizer = Summarizer()
+        with _services_lock:
+            if summarizer is None:
+                from services.summarizer import Summarizer
+                summarizer = Summarizer()
     return summarizer
 
 
@@ -56,32 +104,187 @@ def get_dialogue():
     """Get or create dialogue service (lazy initialization)."""
     global dialogue_service
     if dialogue_service is None:
-        dialogue_service = SocraticDialogue()
+        with _services_lock:
+            if dialogue_service is None:
+                from services.dialogue_service import get_socratic_dialogue
+                dialogue_service = get_socratic_dialogue()
     return dialogue_service
 
 
+def get_document_extractor():
+    """Get or create the document extractor (lazy initialization)."""
+    global document_extractor
+    if document_extractor is None:
+        with _services_lock:
+            if document_extractor is None:
+                from services.document_extractor import DocumentExtractor
+                document_extractor = DocumentExtractor()
+    return document_extractor
+
+
+def get_url_extractor():
+    """Get or create the URL extractor (lazy initialization)."""
+    global url_extractor
+    if url_extractor is None:
+        with _services_lock:
+            if url_extractor is None:
+                from services.url_extractor import URLExtractor
+                url_extractor = URLExtractor()
+    return url_extractor
+
+
+def cached_response(key, compute):
+    """
+    Serve compute() through the response cache.
+
+    Honours a `Cache-Control: no-store` request header by bypassing the
+    cache; the outcome is reported in the X-Cache response header.
+    """
+    if "no-store" in request.headers.get("Cache-Control", ""):
+        g.cache_status = "miss"
+        return compute()
+
+    value, hit = response_cache.get_or_compute(key, response_cache.DEFAULT_TTL, compute)
+    g.cache_status = "hit" if hit else "miss"
+    return value
+
+
+def _related(query: str) -> tuple:
+    """
+    Look up existing documents related to a dialogue message.
+
+    Returns a tuple of (title, similarity, content_snippet). Repeated and
+    near-duplicate messages are served by the manager's query cache, which
+    expires entries and is cleared on writes.
+    """
+    related = get_chroma().query_coalescer.query(
+        query, n_results=3, min_similarity=0.3, content_max_chars=500
+    )
+    return tuple(
+        (r["metadata"].get("title", r["id"]), r["similarity"], r["content"])
+        for r in related
+    )
+
+
+ETAG_WINDOW = 60  # seconds; validators roll over at least this often
+
+
+def _collection_etag(cm) -> Optional[str]:
+    """
+    Cheap validator for collection-derived responses (one count() round-trip),
+    or None when this worker can't tell whether the collection changed.
+
+    Writes bump a Redis stamp shared by all workers when REDIS_URL is set.
+    Without it, last_write_ts only sees this worker's writes, so
+    multi-worker servers send no validator at all. Writes made outside the
+    dashboard (the bot) show up once the ETAG_WINDOW rolls over.
+    """
+    stamp = cm.shared_write_stamp()
+    if stamp is None:
+        if request.environ.get("wsgi.multiprocess"):
+            return None
+        stamp = cm.last_write_ts
+    window = int(time.time() // ETAG_WINDOW)
+    return hashlib.md5(f"{cm.collection.count()}:{stamp}:{window}".encode()).hexdigest()
+
+
+def _not_modified(etag: str):
+    """Empty 304 response for a matching If-None-Match."""
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _format_related(row: tuple) -> str:
+    """Format one (title, similarity, snippet) row for the dialogue prompt."""
+    return "[Existing: %s] %s" % (row[0], row[2])
+
+
+@app.after_request
+def add_cache_header(response):
+    """Expose response-cache hits/misses to clients."""
+    cache_status = g.get("cache_status")
+    if cache_status:
+        response.headers["X-Cache"] = cache_status
+    return response
+
+
 # =============================================================================
 # Authentication
 # =============================================================================
 
 DASHBOARD_PASSWORD = os.getenv("DASHBOARD_PASSWORD", "hushful-admin-2026")
 
+# Failed login attempts allowed per client within LOGIN_WINDOW seconds
+LOGIN_MAX_FAILURES = 5
+LOGIN_WINDOW = 60
+LOGIN_MAX_CLIENTS = 10_000  # clients tracked at once; the stalest are dropped first
+
+# client -> failure times, least recently failed first
+_login_failures: "OrderedDict[str, deque]" = OrderedDict()
+_login_failures_lock = threading.Lock()
+
+
+def _login_client_id() -> str:
+    # remote_addr is the proxy-resolved client address (see TRUSTED_PROXY_HOPS)
+    return request.remote_addr or ""
+
+
+def _login_blocked(client_id: str) -> bool:
+    """Whether the client has used up its failed attempts for this window."""
+    cutoff = time.monotonic() - LOGIN_WINDOW
+    with _login_failures_lock:
+        failures = _login_failures.get(client_id)
+        if not failures:
+            return False
+        while failures and failures[0] < cutoff:
+            failures.popleft()
+        if not failures:
+            del _login_failures[client_id]
+            return False
+        return len(failures) >= LOGIN_MAX_FAILURES
+
+
+def _record_login_failure(client_id: str):
+    now = time.monotonic()
+    with _login_failures_lock:
+        _login_failures.setdefault(client_id, deque()).append(now)
+        _login_failures.move_to_end(client_id)
+
+        # Sweep clients whose last failure has left the window, then cap
+        # the table, so a stream of distinct clients can't grow it forever
+        cutoff = now - LOGIN_WINDOW
+        while _login_failures:
+            oldest = next(iter(_login_failures.values()))
+            if oldest[-1] >= cutoff and len(_login_failures) <= LOGIN_MAX_CLIENTS:
+                break
+            _login_failures.popitem(last=False)
+
+
+# Environment doesn't change during the process lifetime, so report it once
+_ENV_KEYS = (
+    "GOOGLE_API_KEY", "CHROMA_CLOUD_API_KEY", "CHROMA_CLOUD_TENANT",
+    "CHROMA_CLOUD_DATABASE", "ANTHROPIC_API_KEY", "DASHBOARD_PASSWORD",
+    "FLASK_SECRET_KEY"
+)
+_ENV_STATUS = {k: ("set" if os.getenv(k) else "MISSING") for k in _ENV_KEYS}
+
+HEALTH_COUNT_TTL = 5  # seconds
+
+
+@lru_cache(maxsize=1)
+def _health_count(time_bucket: int) -> int:
+    """Collection count, reused for every health check in the same time bucket."""
+    return get_chroma().collection.count()
+
 
 @app.route("/health")
-def health():
+def health() -> ResponseReturnValue:
     """Health check with env var diagnostics (no auth required)."""
-    env_keys = [
-        "GOOGLE_API_KEY", "CHROMA_CLOUD_API_KEY", "CHROMA_CLOUD_TENANT",
-        "CHROMA_CLOUD_DATABASE", "ANTHROPIC_API_KEY", "DASHBOARD_PASSWORD",
-        "FLASK_SECRET_KEY"
-    ]
-    env_status = {k: ("set" if os.getenv(k) else "MISSING") for k in env_keys}
-
     chroma_ok = False
     chroma_error = None
     try:
-        cm = get_chroma()
-        count = cm.collection.count()
+        count = _health_count(int(time.monotonic() // HEALTH_COUNT_TTL))
         chroma_ok = True
         chroma_error = f"connected, {count} docs"
     except Exception as e:
@@ -90,36 +293,80 @@ def health():
     return jsonify({
         "status": "ok" if chroma_ok else "degraded",
         "chroma": chroma_error,
-        "env": env_status
+        "env": _ENV_STATUS
     })
 
 
-def auth_required(f):
-    """Require authentication for dashboard routes."""
+def api_auth_required(f):
+    """Require authentication for JSON API routes (401 when missing)."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not session.get("authenticated"):
+            return jsonify({"success": False, "error": "Not authenticated"}), 401
+        return f(*args, **kwargs)
+    return decorated
+
+
+def page_auth_required(f):
+    """Require authentication for HTML pages (redirects to login)."""
     @wraps(f)
     def decorated(*args, **kwargs):
         if not session.get("authenticated"):
-            if request.is_json or request.path.startswith("/api/"):
-                return jsonify({"success": False, "error": "Not authenticated"}), 401
             return redirect(url_for("login"))
         return f(*args, **kwargs)
     return decorated
 
 
+def require_json(*fields, max_bytes=1 << 20):
+    """
+    Parse a JSON object body and pass it to the route as `data`.
+
+    Rejects bodies over max_bytes (None = app-wide MAX_CONTENT_LENGTH only)
+    before reading them, and bodies missing any of the required fields.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if max_bytes is not None and (request.content_length or 0) > max_bytes:
+                return jsonify({"success": False, "error": "Request body too large"}), 413
+
+            try:
+                data = orjson.loads(request.get_data(cache=False))
+            except orjson.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict):
+                return jsonify({"success": False, "error": "Request body must be a JSON object"}), 400
+
+            for field in fields:
+                if not data.get(field):
+                    return jsonify({"success": False, "error": f"Missing required field: {field}"}), 400
+
+            return f(*args, data=data, **kwargs)
+        return decorated
+    return decorator
+
+
 @app.route("/login", methods=["GET", "POST"])
-def login():
+def login() -> ResponseReturnValue:
     """Login page."""
     if request.method == "POST":
+        client_id = _login_client_id()
+        if _login_blocked(client_id):
+            return render_template(
+                "login.html", error="Too many failed attempts. Try again in a minute."
+            ), 429
+
         password = request.form.get("password", "")
-        if password == DASHBOARD_PASSWORD:
+        if hmac.compare_digest(password.encode(), DASHBOARD_PASSWORD.encode()):
             session["authenticated"] = True
             return redirect(url_for("index"))
+        _record_login_failure(client_id)
         return render_template("login.html", error="Invalid password")
     return render_template("login.html", error=None)
 
 
 @app.route("/logout")
-def logout():
+def logout() -> ResponseReturnValue:
     """Logout."""
     session.pop("authenticated", None)
     return redirect(url_for("login"))
@@ -130,8 +377,8 @@ def logout():
 # =============================================================================
 
 @app.route("/")
-@auth_required
-def index():
+@page_auth_required
+def index() -> ResponseReturnValue:
     """Main dashboard page."""
     return render_template("index.html")
 
@@ -141,44 +388,55 @@ def index():
 # =============================================================================
 
 @app.route("/api/documents", methods=["GET"])
-@auth_required
-def list_documents():
+@api_auth_required
+def list_documents() -> ResponseReturnValue:
     """List all documents in the collection."""
     try:
         chroma = get_chroma()
+        etag = _collection_etag(chroma)
+        if etag and request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
         docs = chroma.list_documents()
-        return jsonify({"success": True, "documents": docs})
+        response = ojsonify({"success": True, "documents": docs})
+        if etag:
+            response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Error listing documents: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/documents", methods=["POST"])
-@auth_required
-def add_document():
+@api_auth_required
+@require_json("content", max_bytes=None)
+def add_document(data: dict) -> ResponseReturnValue:
     """Add a new document."""
     try:
-        data = request.json
-        content = data.get("content")
+        content = data["content"]
         metadata = data.get("metadata", {})
 
-        if not content:
-            return jsonify({"success": False, "error": "Content is required"}), 400
+        # Writes are batched in the background; ?sync=1 waits for the flush
+        sync = request.args.get("sync") == "1"
 
         chroma = get_chroma()
-        doc_id = chroma.add_document(content, metadata)
-        return jsonify({"success": True, "id": doc_id})
+        doc_id, created = chroma.add_document(content, metadata, sync=sync)
+        if not created:
+            # Nothing was written and the submitted metadata wasn't applied
+            return jsonify({"success": True, "id": doc_id, "duplicate": True}), 200
+
+        return jsonify({"success": True, "id": doc_id, "duplicate": False}), (200 if sync else 202)
     except Exception as e:
         logger.error(f"Error adding document: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/documents/<doc_id>", methods=["PUT"])
-@auth_required
-def update_document(doc_id):
+@api_auth_required
+@require_json(max_bytes=None)
+def update_document(doc_id: str, data: dict) -> ResponseReturnValue:
     """Update an existing document."""
     try:
-        data = request.json
         content = data.get("content")
         metadata = data.get("metadata")
 
@@ -191,8 +449,8 @@ def update_document(doc_id):
 
 
 @app.route("/api/documents/<doc_id>", methods=["DELETE"])
-@auth_required
-def delete_document(doc_id):
+@api_auth_required
+def delete_document(doc_id: str) -> ResponseReturnValue:
     """Delete a document."""
     try:
         chroma = get_chroma()
@@ -204,33 +462,37 @@ def delete_document(doc_id):
 
 
 @app.route("/api/query", methods=["POST"])
-@auth_required
-def query_documents():
+@api_auth_required
+@require_json("query")
+def query_documents(data: dict) -> ResponseReturnValue:
     """Test retrieval query."""
     try:
-        data = request.json
-        query = data.get("query")
+        query = data["query"]
         n_results = data.get("n_results", 5)
 
-        if not query:
-            return jsonify({"success": False, "error": "Query is required"}), 400
-
         chroma = get_chroma()
         results = chroma.query(query, n_results)
-        return jsonify({"success": True, "results": results})
+        return ojsonify({"success": True, "results": results})
     except Exception as e:
         logger.error(f"Error querying documents: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/api/stats", methods=["GET"])
-@auth_required
-def get_stats():
+@api_auth_required
+def get_stats() -> ResponseReturnValue:
     """Get collection statistics."""
     try:
         chroma = get_chroma()
+        etag = _collection_etag(chroma)
+        if etag and request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
         stats = chroma.get_stats()
-        return jsonify({"success": True, "stats": stats})
+        response = jsonify({"success": True, "stats": stats})
+        if etag:
+            response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
@@ -241,8 +503,8 @@ def get_stats():
 # =============================================================================
 
 @app.route("/api/upload", methods=["POST"])
-@auth_required
-def upload_document():
+@api_auth_required
+def upload_document() -> ResponseReturnValue:
     """Handle file upload and extract text."""
     try:
         if 'file' not in request.files:
@@ -253,9 +515,10 @@ def upload_document():
             return jsonify({"success": False, "error": "No file selected"}), 400
 
         filename = secure_filename(file.filename)
-        file_bytes = file.read()
 
-        text, error = document_extractor.extract(file_bytes, filename)
+        # Hand the spooled upload straight to the extractor instead of
+        # copying the whole payload into a bytes object first
+        text, error = get_document_extractor().extract(file.stream, filename)
 
         if error:
             return jsonify({"success": False, "error": error}), 400
@@ -266,12 +529,12 @@ def upload_document():
                 "error": "No text content could be extracted from the file"
             }), 400
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "filename": filename,
             "text": text,
             "char_count": len(text),
-            "word_count": len(text.split())
+            "word_count": word_count(text)
         })
 
     except Exception as e:
@@ -280,17 +543,14 @@ def upload_document():
 
 
 @app.route("/api/extract-url", methods=["POST"])
-@auth_required
-def extract_url():
+@api_auth_required
+@require_json("url")
+def extract_url(data: dict) -> ResponseReturnValue:
     """Extract text content from a URL."""
     try:
-        data = request.json
-        url = data.get("url")
+        url = data["url"]
 
-        if not url:
-            return jsonify({"success": False, "error": "URL is required"}), 400
-
-        text, title, error = url_extractor.extract(url)
+        text, title, error = get_url_extractor().extract(url)
 
         if error:
             return jsonify({"success": False, "error": error}), 400
@@ -301,13 +561,13 @@ def extract_url():
                 "error": "No text content could be extracted from the URL"
             }), 400
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "url": url,
             "title": title,
             "text": text,
             "char_count": len(text),
-            "word_count": len(text.split())
+            "word_count": word_count(text)
         })
 
     except Exception as e:
@@ -316,24 +576,30 @@ def extract_url():
 
 
 @app.route("/api/summarize", methods=["POST"])
-@auth_required
-def summarize_text():
+@api_auth_required
+@require_json("text", max_bytes=None)
+def summarize_text(data: dict) -> ResponseReturnValue:
     """Generate a faithful summary of the provided text using Claude."""
     try:
-        data = request.json
-        text = data.get("text")
+        text = data["text"]
         source_name = data.get("source_name", "document")
 
-        if not text:
-            return jsonify({"success": False, "error": "Text is required"}), 400
-
         summ = get_summarizer()
-        summary, error = summ.summarize(text, source_name)
+        error = None
+        use_cache = "no-store" not in request.headers.get("Cache-Control", "")
+
+        def compute():
+            nonlocal error
+            summary, error = summ.summarize(text, source_name, use_cache=use_cache)
+            return None if error else summary
+
+        key = response_cache.make_key("sum", summ.MODEL, summ.PROMPT_VERSION, text, source_name)
+        summary = cached_response(key, compute)
 
         if error:
             return jsonify({"success": False, "error": error}), 400
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "summary": summary,
             "original_length": len(text),
@@ -351,16 +617,76 @@ def summarize_text():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/summarize/stream", methods=["POST"])
+@api_auth_required
+@require_json("text", max_bytes=None)
+def summarize_stream(data: dict) -> ResponseReturnValue:
+    """
+    Stream a faithful summary of the provided text as server-sent events.
+
+    Emits `delta` events with summary text as it is generated, then a `done`
+    event carrying the same payload as /api/summarize (or an `error` event).
+    """
+    text = data["text"]
+    source_name = data.get("source_name", "document")
+
+    if not text.strip():
+        return jsonify({"success": False, "error": "No text content to summarize"}), 400
+
+    try:
+        summ = get_summarizer()
+    except ValueError as e:
+        logger.error(f"Summarizer configuration error: {e}")
+        return jsonify({
+            "success": False,
+            "error": "Summarization service not configured. Please set ANTHROPIC_API_KEY."
+        }), 500
+
+    key = response_cache.make_key("sum", summ.MODEL, summ.PROMPT_VERSION, text, source_name)
+    use_cache = "no-store" not in request.headers.get("Cache-Control", "")
+
+    def generate():
+        try:
+            summary = response_cache.get(key) if use_cache else None
+            if summary is None:
+                parts = []
+                for delta in summ.summarize_stream(text, source_name, use_cache=use_cache):
+                    parts.append(delta)
+                    yield _sse({"type": "delta", "text": delta})
+                summary = "".join(parts)
+                if use_cache:
+                    response_cache.set(key, summary)
+            else:
+                yield _sse({"type": "delta", "text": summary})
+
+            yield _sse({
+                "type": "done",
+                "success": True,
+                "summary": summary,
+                "original_length": len(text),
+                "summary_length": len(summary)
+            })
+
+        except Exception as e:
+            yield _sse({"type": "error", "success": False, "error": summ.error_message(e)})
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # =============================================================================
 # Socratic Expert Dialogue
 # =============================================================================
 
 @app.route("/api/dialogue", methods=["POST"])
-@auth_required
-def dialogue_turn():
+@api_auth_required
+@require_json()
+def dialogue_turn(data: dict) -> ResponseReturnValue:
     """Process one turn of the Socratic expert dialogue."""
     try:
-        data = request.json
         messages = data.get("messages", [])
         new_message = data.get("new_message", data.get("message", ""))
         topic = data.get("topic", "")
@@ -369,44 +695,120 @@ def dialogue_turn():
         if not new_message.strip():
             return jsonify({"success": False, "error": "Message is required"}), 400
 
-        # Search existing knowledge for context
-        chroma = get_chroma()
-        related = chroma.query(new_message, n_results=3)
-        related_context = "\n".join([
-            f"[Existing: {r['metadata'].get('title', r['id'])}] {r['content'][:500]}"
-            for r in related if r.get("similarity", 0) > 0.3
-        ])
-
-        dlg = get_dialogue()
-        result = dlg.process_turn(
-            messages=messages,
-            new_message=new_message,
-            topic=topic,
-            consensus_points=consensus_points,
-            related_context=related_context
-        )
-
-        return jsonify({
-            "success": True,
-            "reply": result["reply"],
-            "consensus_point": result.get("consensus_point"),
-            "related_existing": [
-                {"title": r["metadata"].get("title", r["id"]), "similarity": r.get("similarity")}
-                for r in related[:3]
-            ]
-        })
+        def compute():
+            related = _related(new_message)
+            dlg = get_dialogue()
+            result = dlg.process_turn(
+                messages=messages,
+                new_message=new_message,
+                topic=topic,
+                consensus_points=consensus_points,
+                related_context="\n".join(map(_format_related, related))
+            )
+            return _dialogue_payload(result, related)
+
+        key = _dialogue_cache_key(messages, new_message, topic, consensus_points)
+        return ojsonify(cached_response(key, compute))
 
     except Exception as e:
         logger.error(f"Dialogue error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/dialogue/stream", methods=["POST"])
+@api_auth_required
+@require_json()
+def dialogue_stream(data: dict) -> ResponseReturnValue:
+    """
+    Stream one turn of the Socratic expert dialogue as server-sent events.
+
+    Emits `delta` events with reply text as it is generated, then a `done`
+    event carrying the same payload as /api/dialogue (or an `error` event).
+    """
+    messages = data.get("messages", [])
+    new_message = data.get("new_message", data.get("message", ""))
+    topic = data.get("topic", "")
+    consensus_points = data.get("consensus_points", [])
+
+    if not new_message.strip():
+        return jsonify({"success": False, "error": "Message is required"}), 400
+
+    key = _dialogue_cache_key(messages, new_message, topic, consensus_points)
+    use_cache = "no-store" not in request.headers.get("Cache-Control", "")
+
+    def generate():
+        try:
+            cached = response_cache.get(key) if use_cache else None
+            if cached is not None:
+                yield _sse({"type": "delta", "text": cached["reply"]})
+                yield _sse({"type": "done", **cached})
+                return
+
+            related = _related(new_message)
+            dlg = get_dialogue()
+            parts = []
+            for text in dlg.process_turn_stream(
+                messages=messages,
+                new_message=new_message,
+                topic=topic,
+                consensus_points=consensus_points,
+                related_context="\n".join(map(_format_related, related))
+            ):
+                parts.append(text)
+                yield _sse({"type": "delta", "text": text})
+
+            payload = _dialogue_payload(dlg.parse_reply("".join(parts)), related)
+            if use_cache:
+                response_cache.set(key, payload)
+            yield _sse({"type": "done", **payload})
+
+        except Exception as e:
+            logger.error(f"Dialogue stream error: {e}")
+            yield _sse({"type": "error", "success": False, "error": str(e)})
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _dialogue_cache_key(messages, new_message, topic, consensus_points) -> str:
+    """Response-cache key for a dialogue turn (includes the full history)."""
+    return response_cache.make_key(
+        "dlg",
+        new_message,
+        topic,
+        orjson.dumps(consensus_points, option=orjson.OPT_SORT_KEYS).decode(),
+        orjson.dumps(messages, option=orjson.OPT_SORT_KEYS).decode()
+    )
+
+
+def _dialogue_payload(result, related) -> dict:
+    """Response body for a dialogue turn."""
+    return {
+        "success": True,
+        "reply": result["reply"],
+        "consensus_points": result.get("consensus_points", []),
+        "consensus_point": result.get("consensus_point"),
+        "related_existing": [
+            {"title": title, "similarity": similarity}
+            for title, similarity, _ in related[:3]
+        ]
+    }
+
+
+def _sse(obj) -> str:
+    """Format one server-sent event."""
+    return f"data: {orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()}\n\n"
+
+
 @app.route("/api/generate-article", methods=["POST"])
-@auth_required
-def generate_article():
+@api_auth_required
+@require_json()
+def generate_article(data: dict) -> ResponseReturnValue:
     """Generate a markdown article from confirmed consensus points."""
     try:
-        data = request.json
         topic = data.get("topic", "")
         consensus_points = data.get("consensus_points", [])
         category = data.get("category", "general")
@@ -417,7 +819,7 @@ def generate_article():
         dlg = get_dialogue()
         article = dlg.generate_article(topic, consensus_points, category)
 
-        return jsonify({
+        return ojsonify({
             "success": True,
             "article": article,
             "topic": topic,
@@ -4,22 +4,58 @@ ChromaDB Cloud client for RAG dashboard
 Uses Google genai embeddings (gemini-embedding-001) to match the bot's
 KnowledgeService, ensuring documents are searchable from both dashboard and bot.
 """
+import asyncio
+import functools
+import hashlib
 import os
 import logging
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import uuid
 
 import chromadb
+import numpy as np
 import google.genai as genai
+from google.genai import errors as genai_errors
+
+from services import cache as response_cache
 
 logger = logging.getLogger(__name__)
 
+_WS_RE = re.compile(r"\s+")
+
+
+def content_hash(content: str) -> str:
+    """Digest of whitespace-normalized content, stored as metadata["content_hash"]."""
+    normalized = _WS_RE.sub(" ", content).strip()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
 
 class ChromaManager:
     """Manages ChromaDB Cloud connection and operations with Google embeddings."""
 
     EMBEDDING_MODEL = "gemini-embedding-001"
+    FULL_EMBEDDING_DIM = 3072
+    # Matryoshka truncation of gemini-embedding-001's 3072 dims (768 keeps
+    # nearly all recall at a quarter of the size).
+    # Leave unset while the collection is shared with the bot: every writer
+    # and reader of a collection must use the same dimensionality.
+    EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+    EMBED_BATCH = 64  # texts per embed_content request during bulk ingest
+    EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "6"))  # in-flight async batches
+    EMBED_MAX_RETRIES = 5
+    WRITE_STAMP_KEY = "chroma:write-stamp"  # Redis counter bumped by every worker's writes
+    STATS_TTL = 60  # seconds; stats are a dashboard widget, not a hot path
+    CATEGORIES_TTL = 300  # seconds; not reset by writes (a full metadata pass)
+    RECENT_HASHES_SIZE = 4096  # content hashes remembered for de-duplication
 
     def __init__(self):
         """Initialize ChromaDB Cloud connection + Google genai embeddings."""
@@ -38,6 +74,17 @@ class ChromaManager:
         if not google_api_key:
             raise ValueError("GOOGLE_API_KEY is required for embeddings")
         self.genai_client = genai.Client(api_key=google_api_key)
+        # Skips the genai call for texts embedded recently (by any manager)
+        self.embedding_cache = embedding_cache
+        self._embed_config = (
+            {"output_dimensionality": self.EMBEDDING_DIMENSIONS}
+            if self.EMBEDDING_DIMENSIONS else None
+        )
+        # Stored as metadata["embed_dim"] so mixed-dimension collections
+        # can be detected (and re-embedded) later
+        self.embed_dim = self.EMBEDDING_DIMENSIONS or self.FULL_EMBEDDING_DIM
+        # Cache namespace: embeddings differ per model and dimensionality
+        self._embed_key = f"{self.EMBEDDING_MODEL}@{self.embed_dim}"
 
         # Connect to ChromaDB Cloud (use CloudClient like the bot's KnowledgeService)
         self.client = chromadb.CloudClient(
@@ -52,17 +99,81 @@ class ChromaManager:
             metadata={"description": "Hushful metabolic health knowledge base"}
         )
 
+        # Coalesces concurrent dialogue lookups into one batched query
+        self.query_coalescer = BatchQueryCoalescer(self)
+        # Buffers document adds into batched embed + collection.add calls
+        self.write_batcher = WriteBatcher(self)
+
+        # Reuses results for repeated / near-duplicate query texts
+        self.query_cache = SemanticQueryCache()
+
+        # content hash -> doc id for documents added by this process, so
+        # re-submitted content is recognised without a Chroma lookup
+        self._recent_hashes: "OrderedDict[str, str]" = OrderedDict()
+        self._hash_lock = threading.Lock()
+
+        # (computed_at, stats) from the last get_stats(); dropped on writes
+        self._stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        # (computed_at, counts) from the last per-category pass
+        self._categories_cache: Optional[Tuple[float, Dict[str, int]]] = None
+
+        # Bumped on every successful write (this process only; see
+        # shared_write_stamp); feeds HTTP validators for list/stats
+        self.last_write_ts = time.time()
+
         logger.info(f"Connected to ChromaDB Cloud: {self.collection_name}")
 
+    def _mark_written(self):
+        """Record a successful write and drop results it may have made stale."""
+        self.last_write_ts = time.time()
+        response_cache.incr(self.WRITE_STAMP_KEY)
+        self.query_cache.clear()
+        self._stats_cache = None
+
+    def shared_write_stamp(self) -> Optional[int]:
+        """Write counter shared by all workers via Redis, or None without Redis."""
+        if response_cache.get_redis() is None:
+            return None
+        return response_cache.get(self.WRITE_STAMP_KEY) or 0
+
     def _embed(self, text: str) -> List[float]:
         """Generate embedding using Google genai (same model as bot)."""
-        result = self.genai_client.models.embed_content(
-            model=self.EMBEDDING_MODEL,
-            contents=text
-        )
-        return result.embeddings[0].values
+        return self._embed_batch([text])[0]
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts in a single genai request.
+
+        Texts found in the embedding cache are not sent.
+        """
+        out, missing = self.embedding_cache.lookup(self._embed_key, texts)
+        if missing:
+            result = self.genai_client.models.embed_content(
+                model=self.EMBEDDING_MODEL,
+                contents=[texts[i] for i in missing],
+                config=self._embed_config
+            )
+            self._fill_embeddings(out, missing, texts, [e.values for e in result.embeddings])
+        return out
 
-    def list_documents(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    def _fill_embeddings(
+        self,
+        out: List[Optional[List[float]]],
+        missing: List[int],
+        texts: List[str],
+        embeddings: List[List[float]]
+    ):
+        """Place freshly computed embeddings into out and cache them."""
+        for i, values in zip(missing, embeddings):
+            if self.EMBEDDING_DIMENSIONS:
+                # Only the full-size output is unit-norm; rescale truncated vectors
+                vec = np.asarray(values, dtype=np.float64)
+                norm = np.linalg.norm(vec)
+                values = (vec / norm).tolist() if norm else values
+            out[i] = values
+            self.embedding_cache.put(self._embed_key, texts[i], values)
+
+    def list_documents(self, limit: int = 50, offset: int = 0) -> List["DocRow"]:
         """List all documents in the collection."""
         result = self.collection.get(
             limit=limit,
@@ -70,40 +181,224 @@ class ChromaManager:
             include=["documents", "metadatas"]
         )
 
-        documents = []
-        for i, doc_id in enumerate(result["ids"]):
-            documents.append({
-                "id": doc_id,
-                "content": result["documents"][i] if result["documents"] else "",
-                "metadata": result["metadatas"][i] if result["metadatas"] else {}
-            })
+        ids = result["ids"]
+        contents = result["documents"] or [""] * len(ids)
+        metadatas = [meta or {} for meta in (result["metadatas"] or [None] * len(ids))]
 
-        return documents
+        return [DocRow(*row) for row in zip(ids, contents, metadatas)]
 
     def add_document(
         self,
         content: str,
-        metadata: Optional[Dict] = None
-    ) -> str:
-        """Add a new document with Google genai embedding."""
+        metadata: Optional[Dict] = None,
+        sync: bool = False
+    ) -> Tuple[str, bool]:
+        """
+        Add a new document with Google genai embedding.
+
+        The write is queued on the batched writer and the (client-generated)
+        id is returned without waiting for the flush. With sync=True, waits
+        until the batch holding the document has been stored, raising if the
+        write failed.
+
+        Content already in the collection (compared after collapsing
+        whitespace) isn't stored again, and the given metadata is not applied
+        to it. The duplicate check runs before queueing, so content this
+        process hasn't seen costs one synchronous Chroma lookup.
+
+        Returns:
+            Tuple of (doc_id, created); created is False when doc_id is the
+            existing duplicate's id.
+        """
+        chash = content_hash(content)
+        existing_id = self._find_by_hash(chash)
+        if existing_id is not None:
+            logger.info(f"Skipped duplicate of {existing_id}")
+            return existing_id, False
+
         doc_id = f"doc_{uuid.uuid4().hex[:12]}"
 
         if metadata is None:
             metadata = {}
 
         metadata["created_at"] = datetime.utcnow().isoformat()
+        metadata["content_hash"] = chash
 
-        embedding = self._embed(content)
+        def forget_if_failed(f: Future):
+            if f.exception() is not None:
+                self._forget_hash(doc_id)
 
-        self.collection.add(
-            ids=[doc_id],
-            documents=[content],
-            embeddings=[embedding],
-            metadatas=[metadata]
-        )
+        self._remember_hash(chash, doc_id)
+        future = self.write_batcher.submit(doc_id, content, metadata)
+        future.add_done_callback(forget_if_failed)
+        if sync:
+            future.result()
+
+        return doc_id, True
+
+    def _find_by_hash(self, chash: str) -> Optional[str]:
+        """Id of a stored (or queued) document with this content hash, if any."""
+        with self._hash_lock:
+            doc_id = self._recent_hashes.get(chash)
+        if doc_id is not None:
+            return doc_id
+
+        try:
+            result = self.collection.get(where={"content_hash": chash}, limit=1, include=[])
+        except Exception as e:
+            logger.warning(f"Duplicate check failed, adding anyway: {e}")
+            return None
+
+        if result["ids"]:
+            self._remember_hash(chash, result["ids"][0])
+            return result["ids"][0]
+        return None
+
+    def _remember_hash(self, chash: str, doc_id: str):
+        with self._hash_lock:
+            self._recent_hashes[chash] = doc_id
+            self._recent_hashes.move_to_end(chash)
+            while len(self._recent_hashes) > self.RECENT_HASHES_SIZE:
+                self._recent_hashes.popitem(last=False)
+
+    def _forget_hash(self, doc_id: str):
+        """Drop any remembered hash pointing at doc_id (deleted, edited or failed)."""
+        with self._hash_lock:
+            for chash in [h for h, d in self._recent_hashes.items() if d == doc_id]:
+                del self._recent_hashes[chash]
+
+    def add_documents(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Add many documents, embedding EMBED_BATCH texts per genai request.
+
+        Each batch is stored with a single `collection.add`, so N documents
+        cost ceil(N / EMBED_BATCH) round-trips instead of N. Inputs are
+        batched by length; the returned ids stay in input order. Ids and
+        created_at are filled in when not supplied. Raises on failure;
+        batches stored before the failing one are kept.
+        """
+        if metadatas is None:
+            metadatas = [{} for _ in contents]
+        if ids is None:
+            ids = [f"doc_{uuid.uuid4().hex[:12]}" for _ in contents]
+        if not (len(contents) == len(metadatas) == len(ids)):
+            raise ValueError("contents, metadatas and ids must have the same length")
+
+        created_at = datetime.utcnow().isoformat()
+        for content, metadata in zip(contents, metadatas):
+            metadata.setdefault("created_at", created_at)
+            metadata.setdefault("content_hash", content_hash(content))
+            metadata["embed_dim"] = self.embed_dim
+
+        # Similar-length texts share a batch, so less of each request is padding
+        for batch in self._length_sorted_batches(contents):
+            batch_ids = [ids[i] for i in batch]
+            batch_metadatas = [metadatas[i] for i in batch]
+            texts = [contents[i] for i in batch]
+            self.collection.add(
+                ids=batch_ids,
+                documents=texts,
+                embeddings=self._embed_batch(texts),
+                metadatas=batch_metadatas
+            )
+            self._mark_written()
 
-        logger.info(f"Added document: {doc_id}")
-        return doc_id
+        logger.info(f"Added {len(ids)} documents")
+        return ids
+
+    async def aadd_documents(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Async bulk add: like add_documents, but with up to EMBED_CONCURRENCY
+        batches in flight at once.
+
+        Inputs are sorted by length before batching so each request holds
+        texts of similar size. Rate-limited (429) embedding calls are retried
+        with jittered exponential backoff, honouring Retry-After when sent.
+        Returns ids in input order.
+        """
+        if metadatas is None:
+            metadatas = [{} for _ in contents]
+        if ids is None:
+            ids = [f"doc_{uuid.uuid4().hex[:12]}" for _ in contents]
+        if not (len(contents) == len(metadatas) == len(ids)):
+            raise ValueError("contents, metadatas and ids must have the same length")
+
+        created_at = datetime.utcnow().isoformat()
+        for content, metadata in zip(contents, metadatas):
+            metadata.setdefault("created_at", created_at)
+            metadata.setdefault("content_hash", content_hash(content))
+            metadata["embed_dim"] = self.embed_dim
+
+        sem = asyncio.Semaphore(self.EMBED_CONCURRENCY)
+
+        async def store(batch: List[int]):
+            texts = [contents[i] for i in batch]
+            async with sem:
+                embeddings = await self._aembed_batch(texts)
+            # The Chroma client is sync; keep it off the event loop
+            await asyncio.to_thread(
+                self.collection.add,
+                ids=[ids[i] for i in batch],
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=[metadatas[i] for i in batch]
+            )
+            self._mark_written()
+
+        await asyncio.gather(*(store(batch) for batch in self._length_sorted_batches(contents)))
+
+        logger.info(f"Added {len(ids)} documents")
+        return ids
+
+    async def _aembed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Async _embed_batch, retrying 429s with jittered exponential backoff."""
+        out, missing = self.embedding_cache.lookup(self._embed_key, texts)
+        if not missing:
+            return out
+
+        for attempt in range(self.EMBED_MAX_RETRIES + 1):
+            try:
+                result = await self.genai_client.aio.models.embed_content(
+                    model=self.EMBEDDING_MODEL,
+                    contents=[texts[i] for i in missing],
+                    config=self._embed_config
+                )
+                self._fill_embeddings(out, missing, texts, [e.values for e in result.embeddings])
+                return out
+            except genai_errors.APIError as e:
+                if e.code != 429 or attempt == self.EMBED_MAX_RETRIES:
+                    raise
+                delay = self._retry_after(e) or min(2 ** attempt, 30)
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning(f"Embedding rate limited, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds from the Retry-After header of a failed genai call, if any."""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _length_sorted_batches(self, contents: List[str]) -> List[List[int]]:
+        """Group indices into EMBED_BATCH-sized batches of similar-length texts."""
+        order = sorted(range(len(contents)), key=lambda i: len(contents[i]))
+        return [
+            order[start:start + self.EMBED_BATCH]
+            for start in range(0, len(order), self.EMBED_BATCH)
+        ]
 
     def update_document(
         self,
@@ -118,18 +413,27 @@ class ChromaManager:
             if content:
                 update_kwargs["documents"] = [content]
                 update_kwargs["embeddings"] = [self._embed(content)]
+                # Keep the de-duplication hash in step with the new content
+                metadata = {
+                    **(metadata or {}),
+                    "content_hash": content_hash(content),
+                    "embed_dim": self.embed_dim
+                }
+                self._forget_hash(doc_id)
 
             if metadata:
-                # Get existing metadata and merge
-                existing = self.collection.get(ids=[doc_id], include=["metadatas"])
-                if existing["metadatas"]:
-                    merged = {**existing["metadatas"][0], **metadata}
-                else:
-                    merged = metadata
-                merged["updated_at"] = datetime.utcnow().isoformat()
-                update_kwargs["metadatas"] = [merged]
+                # Chroma merges metadata keys on the server, so only the
+                # changed keys are sent (no read-modify-write to race with
+                # other workers or the bot)
+                update_kwargs["metadatas"] = [
+                    {**metadata, "updated_at": datetime.utcnow().isoformat()}
+                ]
+
+            if len(update_kwargs) == 1:
+                return True  # nothing to change
 
             self.collection.update(**update_kwargs)
+            self._mark_written()
             logger.info(f"Updated document: {doc_id}")
             return True
         except Exception as e:
@@ -140,6 +444,8 @@ class ChromaManager:
         """Delete a document from the collection."""
         try:
             self.collection.delete(ids=[doc_id])
+            self._forget_hash(doc_id)
+            self._mark_written()
             logger.info(f"Deleted document: {doc_id}")
             return True
         except Exception as e:
@@ -149,10 +455,25 @@ class ChromaManager:
     def query(
         self,
         query_text: str,
-        n_results: int = 5
+        n_results: int = 5,
+        min_similarity: Optional[float] = None,
+        content_max_chars: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Query the collection using Google genai embeddings."""
+        """
+        Query the collection using Google genai embeddings.
+
+        Rows at or below min_similarity are dropped and content is cut to
+        content_max_chars here, so callers only handle what they use.
+        """
+        options = (n_results, min_similarity, content_max_chars)
+        cached = self.query_cache.get_exact(options, query_text)
+        if cached is not None:
+            return cached
+
         query_embedding = self._embed(query_text)
+        cached = self.query_cache.get_similar(options, query_embedding)
+        if cached is not None:
+            return cached
 
         results = self.collection.query(
             query_embeddings=[query_embedding],
@@ -160,37 +481,417 @@ class ChromaManager:
             include=["documents", "metadatas", "distances"]
         )
 
+        formatted = self._format_query_results(results, 0, min_similarity, content_max_chars)
+        self.query_cache.put(options, query_text, query_embedding, formatted)
+        return formatted
+
+    def query_batch(
+        self,
+        query_texts: List[str],
+        n_results: int = 5,
+        min_similarity: Optional[float] = None,
+        content_max_chars: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Query several texts with one embedding call and one Chroma round-trip.
+
+        Texts answered by the query cache are left out of both calls.
+        """
+        options = (n_results, min_similarity, content_max_chars)
+        out: List[Optional[List[Dict[str, Any]]]] = [
+            self.query_cache.get_exact(options, text) for text in query_texts
+        ]
+
+        pending = [i for i, rows in enumerate(out) if rows is None]
+        if not pending:
+            return out
+
+        embeddings = self._embed_batch([query_texts[i] for i in pending])
+        misses = []
+        for i, embedding in zip(pending, embeddings):
+            out[i] = self.query_cache.get_similar(options, embedding)
+            if out[i] is None:
+                misses.append((i, embedding))
+
+        if misses:
+            results = self.collection.query(
+                query_embeddings=[embedding for _, embedding in misses],
+                n_results=n_results,
+                include=["documents", "metadatas", "distances"]
+            )
+            for row, (i, embedding) in enumerate(misses):
+                out[i] = self._format_query_results(results, row, min_similarity, content_max_chars)
+                self.query_cache.put(options, query_texts[i], embedding, out[i])
+
+        return out
+
+    @staticmethod
+    def _format_query_results(
+        results: Dict[str, Any],
+        row: int,
+        min_similarity: Optional[float] = None,
+        content_max_chars: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Format (and optionally filter/truncate) one query's rows from a Chroma response."""
+        ids = results["ids"][row]
+        count = len(ids)
+        docs = results["documents"][row] if results["documents"] else [""] * count
+        metas = results["metadatas"][row] if results["metadatas"] else [{}] * count
+
+        if results["distances"]:
+            # One vectorized op for every row's similarity
+            dists = np.asarray(results["distances"][row], dtype=np.float64)
+            distances = dists.tolist()
+            similarities = (1.0 - dists).tolist()
+        else:
+            distances = similarities = [None] * count
+
         formatted = []
-        for i, doc_id in enumerate(results["ids"][0]):
+        for doc_id, content, metadata, distance, similarity in zip(ids, docs, metas, distances, similarities):
+            if min_similarity is not None and (similarity or 0) <= min_similarity:
+                continue
+            if content_max_chars is not None:
+                content = content[:content_max_chars]
+
             formatted.append({
                 "id": doc_id,
-                "content": results["documents"][0][i] if results["documents"] else "",
-                "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                "distance": results["distances"][0][i] if results["distances"] else None,
-                "similarity": 1 - results["distances"][0][i] if results["distances"] else None
+                "content": content,
+                "metadata": metadata,
+                "distance": distance,
+                "similarity": similarity
             })
 
         return formatted
 
     def get_stats(self) -> Dict[str, Any]:
         """Get collection statistics (stays within free tier quota)."""
-        count = self.collection.count()
+        cached = self._stats_cache
+        if cached is not None and time.time() - cached[0] < self.STATS_TTL:
+            return cached[1]
 
-        # Get category counts — use small limit to stay within Chroma Cloud quota
-        categories = {}
+        stats = {
+            "total_documents": self.collection.count(),
+            "collection_name": self.collection_name,
+            "categories": self._categories()
+        }
+        self._stats_cache = (time.time(), stats)
+        return stats
+
+    def _categories(self, page_size: int = 100) -> Dict[str, int]:
+        """
+        Count documents per category, as stored (including the bot's).
+
+        Pages through metadata only, in quota-sized pages. The tally is
+        kept for CATEGORIES_TTL rather than dropped on every write, since a
+        full pass costs one round-trip per page.
+        """
+        cached = self._categories_cache
+        if cached is not None and time.time() - cached[0] < self.CATEGORIES_TTL:
+            return cached[1]
+
+        categories: Dict[str, int] = {}
         try:
-            result = self.collection.get(
-                limit=min(count, 100),
-                include=["metadatas"]
-            )
-            for meta in (result["metadatas"] or []):
-                cat = meta.get("category", "uncategorized") if meta else "uncategorized"
-                categories[cat] = categories.get(cat, 0) + 1
+            offset = 0
+            while True:
+                result = self.collection.get(
+                    limit=page_size,
+                    offset=offset,
+                    include=["metadatas"]
+                )
+                metadatas = result["metadatas"] or []
+                for meta in metadatas:
+                    cat = (meta or {}).get("category") or "uncategorized"
+                    categories[cat] = categories.get(cat, 0) + 1
+                offset += len(result["ids"])
+                if len(result["ids"]) < page_size:
+                    break
         except Exception as e:
             logger.warning(f"Could not fetch categories: {e}")
+            return cached[1] if cached is not None else {}
 
-        return {
-            "total_documents": count,
-            "collection_name": self.collection_name,
-            "categories": categories
-        }
+        self._categories_cache = (time.time(), categories)
+        return categories
+
+
+@dataclass(slots=True)
+class DocRow:
+    """One stored document; serialized as {id, content, metadata} by orjson."""
+    id: str
+    content: str
+    metadata: Dict[str, Any]
+
+
+class EmbeddingCache:
+    """Thread-safe LRU of embeddings keyed by (model, text digest).
+
+    Keys hold a 16-byte blake2b digest rather than the text, so memory is
+    bounded by MAX_SIZE embeddings however long the cached texts are.
+    """
+
+    MAX_SIZE = 2048
+
+    def __init__(self):
+        self._entries: "OrderedDict[Tuple[str, bytes], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model: str, text: str) -> Tuple[str, bytes]:
+        return model, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def lookup(self, model: str, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        """Return (embeddings with None for misses, indices of the misses)."""
+        out: List[Optional[List[float]]] = []
+        missing = []
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = self._key(model, text)
+                values = self._entries.get(key)
+                if values is not None:
+                    self._entries.move_to_end(key)
+                else:
+                    missing.append(i)
+                out.append(values)
+        return out, missing
+
+    def put(self, model: str, text: str, values: List[float]):
+        key = self._key(model, text)
+        with self._lock:
+            self._entries[key] = values
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.MAX_SIZE:
+                self._entries.popitem(last=False)
+
+    def cache_clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Embeddings depend only on model + text, so one cache serves every manager
+embedding_cache = EmbeddingCache()
+
+
+class SemanticQueryCache:
+    """LRU of recent query results, matched by exact text or by embedding.
+
+    A lookup whose embedding has cosine similarity >= THRESHOLD with a
+    cached query (made with the same options) reuses that query's results.
+    Entries expire after TTL seconds and the cache is cleared on writes.
+    """
+
+    MAX_SIZE = 256
+    THRESHOLD = 0.97
+    TTL = int(os.getenv("QUERY_CACHE_TTL", "300"))  # seconds
+
+    def __init__(self):
+        # (options, text) -> (inserted_at, unit embedding, formatted results)
+        self._entries: "OrderedDict[tuple, Tuple[float, np.ndarray, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Stacked unit embeddings of all entries, rebuilt lazily after changes
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[tuple] = []
+
+    def get_exact(self, options: tuple, text: str) -> Optional[list]:
+        """Return cached results for this exact query text, if fresh."""
+        key = (options, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.TTL:
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def get_similar(self, options: tuple, embedding: List[float]) -> Optional[list]:
+        """Return the results of the most similar cached query, if close enough."""
+        query = self._normalize(embedding)
+        with self._lock:
+            if not self._entries:
+                return None
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries)
+                self._matrix = np.stack([self._entries[k][1] for k in self._matrix_keys])
+
+            # Rows are unit vectors, so one matrix-vector product gives every cosine
+            scores = self._matrix @ query
+            now = time.monotonic()
+            for idx in np.argsort(scores)[::-1]:
+                if scores[idx] < self.THRESHOLD:
+                    return None
+                key = self._matrix_keys[idx]
+                entry = self._entries.get(key)
+                if key[0] != options or entry is None or now - entry[0] > self.TTL:
+                    continue
+                self._entries.move_to_end(key)
+                return entry[2]
+            return None
+
+    def put(self, options: tuple, text: str, embedding: List[float], results: list):
+        """Cache a query's formatted results."""
+        key = (options, text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), self._normalize(embedding), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.MAX_SIZE:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _evict(self, key: tuple):
+        del self._entries[key]
+        self._matrix = None
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+
+class _BackgroundBatcher:
+    """Drains queued work items in batches on a lazily started daemon thread.
+
+    A batch is dispatched once MAX_BATCH items are pending, or MAX_WAIT
+    seconds after the first one arrived, whichever comes first.
+    """
+
+    MAX_BATCH = 32
+    MAX_WAIT = 0.01  # seconds
+    THREAD_NAME = "chroma-batcher"
+
+    def __init__(self, manager: "ChromaManager"):
+        self.manager = manager
+        self._pending: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _enqueue(self, item: tuple):
+        self._ensure_worker()
+        self._pending.put(item)
+
+    def _ensure_worker(self):
+        # Started lazily so the thread belongs to the serving process
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=self.THREAD_NAME, daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.MAX_WAIT
+            while len(batch) < self.MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[tuple]):
+        raise NotImplementedError
+
+
+class BatchQueryCoalescer(_BackgroundBatcher):
+    """Coalesces concurrent queries into batched embed + Chroma calls.
+
+    Callers block in `query()` while the background thread resolves each
+    request with its slice of a single `query_batch` call.
+    """
+
+    THREAD_NAME = "chroma-query-coalescer"
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        min_similarity: Optional[float] = None,
+        content_max_chars: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Queue a query for the next batch and wait for its results."""
+        future: Future = Future()
+        self._enqueue(((n_results, min_similarity, content_max_chars), query_text, future))
+        return future.result()
+
+    def _dispatch(self, batch: List[tuple]):
+        # Options apply to a whole query_batch call, so group requests that share them
+        groups: Dict[tuple, List[tuple]] = {}
+        for item in batch:
+            groups.setdefault(item[0], []).append(item)
+
+        for options, items in groups.items():
+            try:
+                results = self.manager.query_batch([text for _, text, _ in items], *options)
+            except Exception as e:
+                logger.error(f"Batched query failed ({len(items)} queries): {e}")
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, future), rows in zip(items, results):
+                future.set_result(rows)
+
+
+class WriteBatcher(_BackgroundBatcher):
+    """Buffers document adds and writes them to Chroma in batches.
+
+    A flush is split into length-sorted EMBED_BATCH groups, each stored by
+    its own `ChromaManager.add_documents` call (one genai request and one
+    `collection.add`). Each group's futures resolve as soon as it is stored,
+    to the document ids, or to its own error; a failed group doesn't fail
+    documents already stored by the others.
+    """
+
+    MAX_BATCH = 100
+    MAX_WAIT = 0.2  # seconds
+    THREAD_NAME = "chroma-write-batcher"
+
+    def submit(self, doc_id: str, content: str, metadata: Dict) -> Future:
+        """Queue a document for the next flush."""
+        future: Future = Future()
+        self._enqueue((doc_id, content, metadata, future))
+        return future
+
+    def _dispatch(self, batch: List[tuple]):
+        contents = [content for _, content, _, _ in batch]
+        for group in self.manager._length_sorted_batches(contents):
+            items = [batch[i] for i in group]
+            ids = [doc_id for doc_id, _, _, _ in items]
+            try:
+                self.manager.add_documents(
+                    [content for _, content, _, _ in items],
+                    [metadata for _, _, metadata, _ in items],
+                    ids=ids
+                )
+            except Exception as e:
+                logger.error(f"Batched add failed ({len(items)} documents): {e}")
+                for _, _, _, future in items:
+                    future.set_exception(e)
+                continue
+
+            logger.debug(f"Flushed documents: {', '.join(ids)}")
+            for doc_id, _, _, future in items:
+                future.set_result(doc_id)
+
+
+@functools.lru_cache(maxsize=1)
+def get_chroma_manager() -> ChromaManager:
+    """
+    Process-wide ChromaManager.
+
+    The Chroma and genai clients (and their connection pools) are created
+    once per worker. A failed construction isn't cached, so the next call
+    retries.
+    """
+    return ChromaManager()
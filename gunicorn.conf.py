@@ -7,10 +7,19 @@ import os
 bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
 
 # Workers
+# gthread workers serve `threads` requests concurrently per process, so slow
+# Chroma Cloud / Gemini / Anthropic round-trips overlap instead of queueing
+# (sync workers ignore `threads` entirely). The shared service clients and
+# their caches are thread-safe, so threads can share one set per worker.
 workers = int(os.getenv("GUNICORN_WORKERS", "2"))
-worker_class = "sync"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
 threads = int(os.getenv("GUNICORN_THREADS", "4"))
 
+# Import the app once in the master and fork it into the workers. The
+# Chroma / genai / Anthropic clients are created lazily on first use, so
+# each worker still opens its own connection pools after the fork.
+preload_app = True
+
 # Timeout (increase for large file processing and AI summarization)
 timeout = 300  # 5 minutes
 
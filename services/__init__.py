@@ -1,9 +1,24 @@
 """
 Services for document processing, AI summarization, and expert dialogue.
+
+Service classes are imported on first access, so importing a lightweight
+helper module (e.g. services.cache) doesn't load the anthropic/genai SDKs.
 """
-from .document_extractor import DocumentExtractor
-from .url_extractor import URLExtractor
-from .summarizer import Summarizer
-from .dialogue_service import SocraticDialogue
+import importlib
+
+_EXPORTS = {
+    'DocumentExtractor': '.document_extractor',
+    'URLExtractor': '.url_extractor',
+    'Summarizer': '.summarizer',
+    'SocraticDialogue': '.dialogue_service',
+    'get_socratic_dialogue': '.dialogue_service',
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ['DocumentExtractor', 'URLExtractor', 'Summarizer', 'SocraticDialogue']
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
@@ -0,0 +1,124 @@
+"""
+Response cache for the LLM-backed endpoints.
+Uses Redis when REDIS_URL is set (shared across workers), otherwise a
+bounded in-process TTL cache.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # seconds
+MAX_LOCAL_ENTRIES = 512
+
+_local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+_local_lock = threading.Lock()
+
+_redis = None
+_redis_checked = False
+
+
+def make_key(prefix: str, *parts: str) -> str:
+    """
+    Build a cache key from a namespace prefix and the request inputs.
+
+    The parts are hashed as a JSON array, so no choice of field values
+    (e.g. one containing a separator) can collide with another.
+    """
+    digest = hashlib.sha256(orjson.dumps(parts)).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def get_redis():
+    """Return a Redis client if REDIS_URL is configured (lazy, created once)."""
+    global _redis, _redis_checked
+    if not _redis_checked:
+        url = os.getenv("REDIS_URL")
+        if url:
+            try:
+                import redis
+                # from_url backs the client with a connection pool
+                _redis = redis.Redis.from_url(url)
+            except Exception as e:
+                logger.warning(f"Redis unavailable, using in-process cache: {e}")
+        _redis_checked = True
+    return _redis
+
+
+def get(key: str) -> Optional[Any]:
+    """Return the cached value for key, or None on a miss."""
+    client = get_redis()
+    if client is not None:
+        try:
+            raw = client.get(key)
+            return orjson.loads(raw) if raw is not None else None
+        except Exception as e:
+            logger.warning(f"Redis get failed: {e}")
+            return None
+
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return value
+
+
+def set(key: str, value: Any, ttl: int = DEFAULT_TTL):
+    """Store a JSON-serializable value under key for ttl seconds."""
+    client = get_redis()
+    if client is not None:
+        try:
+            client.set(key, orjson.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning(f"Redis set failed: {e}")
+        return
+
+    with _local_lock:
+        _local[key] = (time.monotonic() + ttl, value)
+        _local.move_to_end(key)
+        while len(_local) > MAX_LOCAL_ENTRIES:
+            _local.popitem(last=False)
+
+
+def incr(key: str) -> Optional[int]:
+    """
+    Atomically increment a counter shared across workers, returning its new
+    value; None without Redis (there is nothing to share it through).
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return client.incr(key)
+    except Exception as e:
+        logger.warning(f"Redis incr failed: {e}")
+        return None
+
+
+def get_or_compute(key: str, ttl: int, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Return (value, hit). On a miss, call fn() and cache its result.
+
+    A None result is returned but never cached, so callers can signal
+    errors that should be retried.
+    """
+    cached = get(key)
+    if cached is not None:
+        return cached, True
+
+    value = fn()
+    if value is not None:
+        set(key, value, ttl)
+    return value, False
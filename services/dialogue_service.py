@@ -3,15 +3,21 @@ Socratic dialogue service for expert knowledge contribution.
 Uses Gemini to guide domain experts through a rigorous, evidence-based
 dialogue that produces verified knowledge claims for the RAG.
 """
+import functools
 import logging
 import os
 import re
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List
 
 import google.genai as genai
 
 logger = logging.getLogger(__name__)
 
+_CP_RE = re.compile(
+    r'\[CONSENSUS_POINT\](.*?)\|(.*?)\|(.*?)\[/CONSENSUS_POINT\]',
+    re.DOTALL,
+)
+
 
 class SocraticDialogue:
     """Manages Socratic expert dialogue for knowledge base contribution."""
@@ -52,48 +58,61 @@ class SocraticDialogue:
             related_context: Existing RAG content related to the message
 
         Returns:
-            {reply: str, consensus_point: dict|None}
+            {reply: str, consensus_points: list, consensus_point: dict|None}
         """
-        system_prompt = self._build_system_prompt(topic, consensus_points, related_context)
-
-        # Build Gemini message format
-        gemini_contents = []
+        reply = "".join(self.process_turn_stream(
+            messages, new_message, topic, consensus_points, related_context
+        ))
+        return self.parse_reply(reply)
 
-        # System instruction as first user turn
-        gemini_contents.append({
-            "role": "user",
-            "parts": [{"text": system_prompt}]
-        })
-        gemini_contents.append({
-            "role": "model",
-            "parts": [{"text": "Understood. I'm ready to work with you on contributing knowledge to the metabolic mental health knowledge base. What would you like to discuss?"}]
-        })
+    def process_turn_stream(
+        self,
+        messages: List[Dict],
+        new_message: str,
+        topic: str,
+        consensus_points: List[Dict],
+        related_context: str,
+    ) -> Iterator[str]:
+        """Process one turn, yielding the reply text as Gemini generates it.
 
-        # Replay chat history
-        for msg in messages:
-            role = "user" if msg["role"] in ("user", "expert") else "model"
-            gemini_contents.append({
-                "role": role,
-                "parts": [{"text": msg["content"]}]
-            })
+        Takes the same arguments as process_turn(); pass the joined text to
+        parse_reply() for the structured result.
+        """
+        system_prompt = self._build_system_prompt(topic, consensus_points, related_context)
 
-        # Add new message
+        # Chat history + new message; the system prompt goes in system_instruction
+        gemini_contents = [
+            {
+                "role": "user" if msg["role"] in ("user", "expert") else "model",
+                "parts": [{"text": msg["content"]}],
+            }
+            for msg in messages
+        ]
         gemini_contents.append({
             "role": "user",
             "parts": [{"text": new_message}]
         })
 
-        response = self.client.models.generate_content(
+        for chunk in self.client.models.generate_content_stream(
             model=self.MODEL,
             contents=gemini_contents,
-        )
+            config={"system_instruction": system_prompt},
+        ):
+            if chunk.text:
+                yield chunk.text
 
-        reply = response.text
-        consensus_point = self._extract_consensus_point(reply)
+    def parse_reply(self, reply: str) -> Dict:
+        """
+        Build the turn result from a full reply.
 
+        consensus_points lists every point in the reply; consensus_point
+        (the first one, or None) is kept for older clients.
+        """
+        points = self._extract_consensus_points(reply)
         return {
             "reply": reply,
-            "consensus_point": consensus_point,
+            "consensus_points": points,
+            "consensus_point": points[0] if points else None,
         }
 
     def generate_article(
@@ -202,18 +221,20 @@ Your role: Help domain experts contribute verified, well-sourced knowledge claim
 """
 
     @staticmethod
-    def _extract_consensus_point(reply_text: str) -> Optional[Dict]:
-        """Extract a consensus point from the bot's reply if present."""
-        match = re.search(
-            r'\[CONSENSUS_POINT\](.*?)\|(.*?)\|(.*?)\[/CONSENSUS_POINT\]',
-            reply_text,
-            re.DOTALL,
-        )
-        if match:
-            return {
+    def _extract_consensus_points(reply_text: str) -> List[Dict]:
+        """Extract all consensus points from the bot's reply."""
+        return [
+            {
                 "claim": match.group(1).strip(),
                 "evidence_level": match.group(2).strip(),
                 "sources": match.group(3).strip(),
                 "confirmed": False,
             }
-        return None
+            for match in _CP_RE.finditer(reply_text)
+        ]
+
+
+@functools.lru_cache(maxsize=1)
+def get_socratic_dialogue() -> SocraticDialogue:
+    """Process-wide SocraticDialogue, sharing one genai client per worker."""
+    return SocraticDialogue()
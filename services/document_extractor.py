@@ -3,12 +3,68 @@ Document text extraction service for multiple file formats.
 Supports PDF, DOCX, EPUB, TXT, and Markdown files.
 """
 import logging
+import math
+import multiprocessing
 import os
+import posixpath
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from typing import Optional, Tuple
+from typing import BinaryIO, List, Optional, Tuple, Union
+from urllib.parse import unquote
 
 logger = logging.getLogger(__name__)
 
+_EXT_RE = re.compile(r'\.([a-z0-9]+)$', re.IGNORECASE)
+
+# PDFs with fewer pages are extracted inline; process startup would dominate
+PDF_PARALLEL_MIN_PAGES = 16
+
+
+def _usable_cpus() -> int:
+    """CPUs this process may run on (cpu_count() reports the whole host in containers)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+PDF_MAX_WORKERS = min(4, _usable_cpus())
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF pages (lazy, created once per serving process)."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                # spawn, not fork: the server process runs request threads
+                _pdf_pool = ProcessPoolExecutor(
+                    max_workers=PDF_MAX_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _pdf_pool
+
+
+def _extract_pdf_pages(path: str, start: int, end: int) -> List[str]:
+    """Pool task: non-empty texts of pages [start, end) of the PDF at path."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path, strict=False)
+    texts = []
+    for index in range(start, end):
+        text = DocumentExtractor._pdf_page_text(reader, reader.pages[index])
+        if text.strip():
+            texts.append(text)
+    return texts
+
 
 class DocumentExtractor:
     """Extracts text from various document formats."""
@@ -21,62 +77,111 @@ class DocumentExtractor:
         '.md': 'text/markdown',
     }
 
-    def extract(self, file_bytes: bytes, filename: str) -> Tuple[str, Optional[str]]:
+    def __init__(self):
+        # Extension -> extractor, built once so extract() is a single lookup
+        self._handlers = {
+            '.pdf': self._extract_pdf,
+            '.docx': self._extract_docx,
+            '.epub': self._extract_epub,
+            '.txt': self._extract_text,
+            '.md': self._extract_text,
+        }
+
+    def extract(
+        self,
+        file: Union[bytes, BinaryIO],
+        filename: str
+    ) -> Tuple[str, Optional[str]]:
         """
         Extract text from a file.
 
         Args:
-            file_bytes: Raw file content as bytes
+            file: Raw file content as bytes, or a seekable binary file object
+                (e.g. an upload's stream, read without copying it into memory)
             filename: Original filename (used to determine format)
 
         Returns:
             Tuple of (extracted_text, error_message)
             If successful, error_message is None.
         """
-        ext = self._get_extension(filename).lower()
+        ext = self._get_extension(filename)
+        handler = self._handlers.get(ext)
 
-        if ext not in self.SUPPORTED_FORMATS:
+        if handler is None:
             supported = ', '.join(self.SUPPORTED_FORMATS.keys())
             return "", f"Unsupported file format: {ext}. Supported: {supported}"
 
+        stream = BytesIO(file) if isinstance(file, (bytes, bytearray)) else file
+
         try:
-            if ext == '.pdf':
-                return self._extract_pdf(file_bytes), None
-            elif ext == '.docx':
-                return self._extract_docx(file_bytes), None
-            elif ext == '.epub':
-                return self._extract_epub(file_bytes), None
-            elif ext in ('.txt', '.md'):
-                return self._extract_text(file_bytes), None
+            return handler(stream), None
         except Exception as e:
             logger.error(f"Error extracting {filename}: {e}")
             return "", f"Failed to extract text: {str(e)}"
 
-        return "", "Unknown error during extraction"
-
-    def _extract_pdf(self, file_bytes: bytes) -> str:
+    def _extract_pdf(self, stream: BinaryIO) -> str:
         """Extract text from PDF using pypdf."""
         from pypdf import PdfReader
 
-        reader = PdfReader(BytesIO(file_bytes))
-        text_parts = []
+        reader = PdfReader(stream, strict=False)
+        page_count = len(reader.pages)
 
-        for page_num, page in enumerate(reader.pages, 1):
+        if page_count >= PDF_PARALLEL_MIN_PAGES and PDF_MAX_WORKERS > 1:
             try:
-                page_text = page.extract_text() or ""
-                if page_text.strip():
-                    text_parts.append(page_text)
+                return self._extract_pdf_parallel(stream, page_count)
             except Exception as e:
-                logger.warning(f"Error extracting page {page_num}: {e}")
-                continue
+                logger.warning(f"Parallel PDF extraction failed, falling back to serial: {e}")
 
-        return "\n\n".join(text_parts)
+        # Pages are extracted lazily as join consumes them, so only the
+        # non-empty page texts are held at once
+        page_texts = (self._pdf_page_text(reader, page) for page in reader.pages)
+        return "\n\n".join(text for text in page_texts if text.strip())
 
-    def _extract_docx(self, file_bytes: bytes) -> str:
+    @staticmethod
+    def _extract_pdf_parallel(stream: BinaryIO, page_count: int) -> str:
+        """
+        Extract page ranges of a large PDF across the process pool.
+
+        The upload is spooled to a temp file and workers open it by path,
+        so the PDF is never held in memory or pickled once per task.
+        """
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as tmp:
+            stream.seek(0)
+            shutil.copyfileobj(stream, tmp)
+            tmp.flush()
+
+            # One contiguous range per task, so each worker parses the PDF
+            # once per range rather than once per page
+            per_task = max(4, math.ceil(page_count / PDF_MAX_WORKERS))
+            pool = _get_pdf_pool()
+            futures = [
+                pool.submit(_extract_pdf_pages, tmp.name, start, min(start + per_task, page_count))
+                for start in range(0, page_count, per_task)
+            ]
+            try:
+                return "\n\n".join(text for future in futures for text in future.result())
+            finally:
+                # Don't delete the file under tasks that are still queued
+                for future in futures:
+                    future.cancel()
+                for future in futures:
+                    if not future.cancelled():
+                        future.exception()
+
+    @staticmethod
+    def _pdf_page_text(reader, page) -> str:
+        """Text of one PDF page, or "" if the page can't be extracted."""
+        try:
+            return page.extract_text() or ""
+        except Exception as e:
+            logger.warning(f"Error extracting page {reader.get_page_number(page) + 1}: {e}")
+            return ""
+
+    def _extract_docx(self, stream: BinaryIO) -> str:
         """Extract text from DOCX using python-docx."""
         from docx import Document
 
-        doc = Document(BytesIO(file_bytes))
+        doc = Document(stream)
         paragraphs = []
 
         for para in doc.paragraphs:
@@ -97,29 +202,77 @@ class DocumentExtractor:
 
         return "\n\n".join(paragraphs)
 
-    def _extract_epub(self, file_bytes: bytes) -> str:
-        """Extract text from EPUB using ebooklib."""
+    def _extract_epub(self, stream: BinaryIO) -> str:
+        """
+        Extract text from EPUB, reading chapters straight from the zip.
+
+        Chapters are decompressed and parsed one at a time in spine
+        (reading) order, so only one chapter's HTML is in memory at once.
+        Falls back to ebooklib for EPUBs whose package can't be read this way.
+        """
+        try:
+            return self._extract_epub_streaming(stream)
+        except Exception as e:
+            logger.warning(f"Streaming EPUB extraction failed, falling back to ebooklib: {e}")
+            stream.seek(0)
+            return self._extract_epub_ebooklib(stream)
+
+    def _extract_epub_streaming(self, stream: BinaryIO) -> str:
+        """Extract EPUB chapter text in spine order using zipfile + lxml."""
+        parser = self._html_parser()
+        text_parts = []
+        with zipfile.ZipFile(stream) as zf:
+            for name in self._epub_spine(zf):
+                try:
+                    with zf.open(name) as f:
+                        data = f.read()
+                    text = self._html_to_text(data, parser)
+                    del data
+                    if text:
+                        text_parts.append(text)
+                except Exception as e:
+                    logger.warning(f"Error extracting EPUB item {name}: {e}")
+                    continue
+
+        return "\n\n".join(text_parts)
+
+    @staticmethod
+    def _epub_spine(zf: zipfile.ZipFile) -> List[str]:
+        """Zip member names of an EPUB's content documents, in spine order."""
+        from lxml import etree
+
+        container = etree.fromstring(zf.read('META-INF/container.xml'))
+        opf_path = container.xpath('//*[local-name()="rootfile"]/@full-path')[0]
+        opf = etree.fromstring(zf.read(opf_path))
+        opf_dir = posixpath.dirname(opf_path)
+
+        hrefs = {
+            item.get('id'): item.get('href')
+            for item in opf.xpath('//*[local-name()="manifest"]/*[local-name()="item"]')
+        }
+        names = []
+        for idref in opf.xpath('//*[local-name()="spine"]/*[local-name()="itemref"]/@idref'):
+            href = hrefs.get(idref)
+            if href:
+                names.append(posixpath.normpath(posixpath.join(opf_dir, unquote(href))))
+
+        if not names:
+            raise ValueError("EPUB spine is empty")
+        return names
+
+    def _extract_epub_ebooklib(self, stream: BinaryIO) -> str:
+        """Extract text from EPUB using ebooklib + lxml."""
         import ebooklib
         from ebooklib import epub
-        from bs4 import BeautifulSoup
 
-        book = epub.read_epub(BytesIO(file_bytes))
+        book = epub.read_epub(stream)
+        parser = self._html_parser()
         text_parts = []
 
         for item in book.get_items():
             if item.get_type() == ebooklib.ITEM_DOCUMENT:
                 try:
-                    soup = BeautifulSoup(item.get_content(), 'lxml')
-
-                    # Remove script and style elements
-                    for element in soup(['script', 'style']):
-                        element.decompose()
-
-                    text = soup.get_text(separator='\n')
-                    # Clean up whitespace
-                    lines = [line.strip() for line in text.split('\n')]
-                    text = '\n'.join(line for line in lines if line)
-
+                    text = self._html_to_text(item.get_content(), parser)
                     if text:
                         text_parts.append(text)
                 except Exception as e:
@@ -128,24 +281,56 @@ class DocumentExtractor:
 
         return "\n\n".join(text_parts)
 
-    def _extract_text(self, file_bytes: bytes) -> str:
+    @staticmethod
+    def _html_parser():
+        """
+        HTML parser shared by one EPUB's chapters (parsers aren't thread-safe,
+        so each extraction builds its own). Comments are dropped while parsing.
+        """
+        from lxml import html as lxml_html
+
+        return lxml_html.HTMLParser(remove_comments=True)
+
+    @staticmethod
+    def _html_to_text(content: bytes, parser) -> str:
+        """Visible text of an (X)HTML document, one stripped line per text node."""
+        from lxml import html as lxml_html
+
+        root = lxml_html.fromstring(content, parser=parser)
+
+        # Remove script and style elements
+        for element in root.xpath('//script|//style'):
+            element.drop_tree()
+
+        return '\n'.join(t.strip() for t in root.itertext() if t.strip())
+
+    def _extract_text(self, stream: BinaryIO) -> str:
         """Extract text from plain text or markdown files."""
-        # Try multiple encodings
-        encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
+        file_bytes = stream.read()
 
-        for encoding in encodings:
-            try:
-                return file_bytes.decode(encoding)
-            except UnicodeDecodeError:
-                continue
+        # Fast path: nearly every upload is UTF-8 (with or without a BOM)
+        if file_bytes.startswith(b'\xef\xbb\xbf'):
+            file_bytes = file_bytes[3:]
+        try:
+            return file_bytes.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+
+        # Otherwise detect the encoding in a single statistical pass
+        from charset_normalizer import from_bytes
+
+        best = from_bytes(file_bytes).best()
+        if best is not None:
+            return str(best)
 
         # Last resort: decode with errors replaced
         return file_bytes.decode('utf-8', errors='replace')
 
     @staticmethod
     def _get_extension(filename: str) -> str:
-        """Get file extension from filename."""
-        return os.path.splitext(filename)[1]
+        """Get the lowercased file extension (with dot) from filename."""
+        match = _EXT_RE.search(filename)
+        return f".{match.group(1).lower()}" if match else ""
 
     @classmethod
     def get_supported_formats(cls) -> list:
@@ -2,23 +2,149 @@
 Claude-powered document summarization service.
 Generates faithful summaries without editorializing.
 """
+import asyncio
+import bisect
+import contextlib
+import functools
+import hashlib
+import html
 import logging
 import os
-from typing import List, Optional, Tuple
+import re
+import threading
+import time
+from typing import Iterator, List, Optional, Tuple
 
 import anthropic
+import httpx
+
+from . import cache as response_cache
 
 logger = logging.getLogger(__name__)
 
+# One keep-alive connection pool per process, shared by every Summarizer,
+# so repeat calls skip the TCP/TLS handshake
+_HTTP_CLIENT = anthropic.DefaultHttpxClient(
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _shared_client(api_key: str) -> anthropic.Anthropic:
+    """The process's Anthropic client for this key, over the shared pool."""
+    return anthropic.Anthropic(api_key=api_key, http_client=_HTTP_CLIENT)
+
+
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\n')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+_WS_RE = re.compile(r'\s+')
+_REPLACEMENT_CHAR_RE = re.compile('\ufffd+')
+
+# Caps in-flight Anthropic requests per process (size to the account's tier)
+_SEM = threading.Semaphore(int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8")))
+
+
+@contextlib.asynccontextmanager
+async def _async_sem_slot():
+    """
+    Hold one _SEM slot from async code, so the chunk fan-out shares the
+    per-process budget with request threads.
+
+    The blocking acquire runs in a worker thread, polling so it can notice
+    the waiter being cancelled. Whichever side sees the other finish first
+    releases the slot, so a cancelled waiter never leaks one.
+    """
+    lock = threading.Lock()
+    cancelled = False
+    acquired = False
+
+    def acquire():
+        nonlocal acquired
+        while True:
+            with lock:
+                if cancelled:
+                    return
+            if _SEM.acquire(timeout=0.1):
+                with lock:
+                    if cancelled:
+                        _SEM.release()
+                    else:
+                        acquired = True
+                return
+
+    try:
+        await asyncio.to_thread(acquire)
+    except BaseException:
+        with lock:
+            cancelled = True
+            if acquired:
+                _SEM.release()
+        raise
+
+    try:
+        yield
+    finally:
+        _SEM.release()
+
+
+class _RateLimiter:
+    """
+    Token bucket refilling `rate` units per `period` seconds (0 = unlimited).
+
+    Thread-safe and loop-agnostic: reserve() books the units and returns how
+    long the caller must wait before using them, so sync callers sleep and
+    async callers await asyncio.sleep() on the same shared budget.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self._level = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1) -> float:
+        if self.capacity <= 0:
+            return 0.0
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.capacity, self._level + (now - self._updated) * self.fill_rate)
+            self._updated = now
+            self._level -= amount
+            return max(0.0, -self._level / self.fill_rate)
+
+
+# Proactive per-process throttles matching the account's Anthropic tier, so
+# bursts (e.g. a large document's chunk fan-out) queue here instead of
+# drawing 429s and retry backoff
+_RPM = _RateLimiter(float(os.getenv("ANTHROPIC_RPM", "50")))
+_INPUT_TPM = _RateLimiter(float(os.getenv("ANTHROPIC_INPUT_TPM", "0")))
+
 
 class Summarizer:
     """Generates faithful summaries using Claude."""
 
     # Claude context limits - using conservative estimates for input
-    MAX_INPUT_CHARS = 100_000  # ~25K tokens approximate
-    CHUNK_SIZE = 80_000  # Characters per chunk for very large docs
+    MAX_INPUT_CHARS = 100_000  # Always sent whole (at most ~100K tokens even for CJK)
+    CHUNK_SIZE = 80_000  # Characters per chunk when the token ratio is unknown
     CHUNK_OVERLAP = 1000  # Overlap between chunks
 
+    # Larger inputs are sized in tokens, from a measured chars-per-token ratio
+    MAX_INPUT_TOKENS = 100_000
+    CHUNK_TOKENS = 60_000
+    TOKEN_SAMPLE_CHARS = 20_000  # Text sent to count_tokens to measure the ratio
+    DEFAULT_CHARS_PER_TOKEN = 4.0
+    MIN_SUMMARIZE_CHARS = 500  # Shorter inputs are returned as their own summary
+    MAX_CONCURRENCY = 5  # Chunk summaries in flight at once for one document
+    # Part summaries shorter than this in total are joined locally, not merged by Claude
+    COMBINE_MIN_CHARS = MAX_INPUT_CHARS // 4
+
+    # Message Batches API (half price, but results can take minutes to hours)
+    BATCH_MIN_CHUNKS = 4  # Smaller fan-outs aren't worth the queueing delay
+    BATCH_POLL_INTERVAL = 10  # seconds
+    BATCH_TIMEOUT = 60 * 60  # seconds
+
     MODEL = "claude-sonnet-4-20250514"
 
     SYSTEM_PROMPT = """You are a document summarization assistant. Your task is to create FAITHFUL summaries of documents.
@@ -35,18 +161,42 @@ CRITICAL INSTRUCTIONS:
 
 Your summary should allow someone to understand what the document says without reading it, while remaining completely faithful to the original content."""
 
-    def __init__(self):
-        """Initialize the Anthropic client."""
+    # System prompt marked as a prompt-cache breakpoint. Anthropic only caches
+    # prefixes of at least 1024 tokens (2048 on Haiku), so this pays off once
+    # the prompt grows past that; below it the marker is simply ignored.
+    SYSTEM_BLOCKS = [
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ]
+
+    # Part of every summary cache key, so prompt edits don't serve stale summaries
+    PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+    def __init__(self, use_batch_api: bool = False, min_summarize_chars: Optional[int] = None):
+        """
+        Initialize the Anthropic client.
+
+        Args:
+            use_batch_api: Summarize the chunks of large documents through the
+                Message Batches API. Only for background work - a batch can
+                take far longer than an HTTP request may stay open.
+            min_summarize_chars: Inputs shorter than this (after cleanup) are
+                returned as-is without an API call; defaults to MIN_SUMMARIZE_CHARS.
+        """
         self.api_key = os.getenv("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
 
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = _shared_client(self.api_key)
+        self.use_batch_api = use_batch_api
+        self.min_summarize_chars = (
+            self.MIN_SUMMARIZE_CHARS if min_summarize_chars is None else min_summarize_chars
+        )
 
     def summarize(
         self,
         text: str,
-        source_name: str = "document"
+        source_name: str = "document",
+        use_cache: bool = True
     ) -> Tuple[str, Optional[str]]:
         """
         Generate a faithful summary of the text.
@@ -54,6 +204,8 @@ Your summary should allow someone to understand what the document says without r
         Args:
             text: The document text to summarize
             source_name: Name of the source for context
+            use_cache: Reuse cached summaries of a large document's chunks
+                (False for a caller asked not to serve cached responses)
 
         Returns:
             Tuple of (summary, error_message)
@@ -62,26 +214,106 @@ Your summary should allow someone to understand what the document says without r
         if not text or not text.strip():
             return "", "No text content to summarize"
 
+        short = self._short_summary(text)
+        if short is not None:
+            return (short, None) if short else ("", "No text content to summarize")
+
         try:
             # Handle very large documents by chunking
-            if len(text) > self.MAX_INPUT_CHARS:
+            chunk_size = self._chunk_size(text)
+            if chunk_size:
                 logger.info(f"Large document ({len(text)} chars), using chunked summarization")
-                return self._summarize_large_document(text, source_name)
+                return self._summarize_large_document(text, source_name, chunk_size, use_cache)
 
             return self._summarize_single(text, source_name)
 
-        except anthropic.RateLimitError:
+        except Exception as e:
+            return "", self.error_message(e)
+
+    def summarize_stream(
+        self,
+        text: str,
+        source_name: str = "document",
+        use_cache: bool = True
+    ) -> Iterator[str]:
+        """
+        Generate a faithful summary of the text, yielding it as it is written.
+
+        Large documents still summarize their chunks up front; only the final
+        combine streams. Unlike summarize(), failures are raised - use
+        error_message() to turn them into a user-facing message.
+        """
+        if not text or not text.strip():
+            raise ValueError("No text content to summarize")
+
+        short = self._short_summary(text)
+        if short is not None:
+            if not short:
+                raise ValueError("No text content to summarize")
+            yield short
+            return
+
+        chunk_size = self._chunk_size(text)
+        if not chunk_size:
+            yield from self._stream_message(
+                model=self.MODEL,
+                max_tokens=4096,
+                system=self.SYSTEM_BLOCKS,
+                messages=[{"role": "user", "content": self._summary_prompt(text, source_name)}]
+            )
+            return
+
+        logger.info(f"Large document ({len(text)} chars), using chunked summarization")
+        chunk_summaries = self._summarize_parts(text, source_name, chunk_size, use_cache)
+        if len(chunk_summaries) == 1:
+            yield chunk_summaries[0]
+        elif sum(len(s) for s in chunk_summaries) < self.COMBINE_MIN_CHARS:
+            yield self._join_summaries(chunk_summaries)
+        else:
+            yield from self._stream_message(
+                model=self.MODEL,
+                max_tokens=4096,
+                system=self.SYSTEM_BLOCKS,
+                messages=[{"role": "user", "content": self._combine_prompt(chunk_summaries, source_name)}]
+            )
+
+    @staticmethod
+    def error_message(e: Exception) -> str:
+        """User-facing message for a summarization failure (logged here)."""
+        if isinstance(e, anthropic.RateLimitError):
             logger.warning("Anthropic rate limit exceeded")
-            return "", "Rate limit exceeded. Please try again in a moment."
-        except anthropic.AuthenticationError:
+            return "Rate limit exceeded. Please try again in a moment."
+        if isinstance(e, anthropic.AuthenticationError):
             logger.error("Anthropic authentication failed")
-            return "", "API authentication failed. Please check your API key."
-        except anthropic.APIError as e:
+            return "API authentication failed. Please check your API key."
+        if isinstance(e, anthropic.APIError):
             logger.error(f"Anthropic API error: {e}")
-            return "", f"API error: {str(e)}"
-        except Exception as e:
-            logger.error(f"Summarization error: {e}")
-            return "", f"Failed to generate summary: {str(e)}"
+            return f"API error: {str(e)}"
+        logger.error(f"Summarization error: {e}")
+        return f"Failed to generate summary: {str(e)}"
+
+    def _short_summary(self, text: str) -> Optional[str]:
+        """
+        The text itself if it is too short to be worth a round-trip, else None.
+
+        Entities and decode-error characters are cleaned first, so
+        nearly-empty extractor output is judged by what it actually says
+        (only for inputs small enough that cleanup could matter); "" means
+        nothing was left.
+        """
+        if len(text) >= self.min_summarize_chars * 4:
+            return None
+        cleaned = _REPLACEMENT_CHAR_RE.sub('', html.unescape(text)).strip()
+        return cleaned if len(cleaned) < self.min_summarize_chars else None
+
+    def _chunk_size(self, text: str) -> Optional[int]:
+        """Chars per chunk for a document too large for one request, else None."""
+        if len(text) <= self.MAX_INPUT_CHARS:
+            return None
+        chars_per_token = self._chars_per_token(text)
+        if len(text) / chars_per_token <= self.MAX_INPUT_TOKENS:
+            return None
+        return int(self.CHUNK_TOKENS * chars_per_token)
 
     def _summarize_single(
         self,
@@ -89,8 +321,53 @@ Your summary should allow someone to understand what the document says without r
         source_name: str
     ) -> Tuple[str, Optional[str]]:
         """Summarize a document that fits in one request."""
+        response = self._create_message(
+            model=self.MODEL,
+            max_tokens=4096,
+            system=self.SYSTEM_BLOCKS,
+            messages=[{"role": "user", "content": self._summary_prompt(text, source_name)}]
+        )
+        return response.content[0].text, None
 
-        user_message = f"""Please provide a faithful summary of the following document.
+    async def _asummarize_single(
+        self,
+        aclient: anthropic.AsyncAnthropic,
+        text: str,
+        source_name: str,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Async _summarize_single for the chunk fan-out.
+
+        Chunk summaries are cached by content, so a retried or re-submitted
+        large document only pays for the chunks that changed.
+        """
+        key = self._cache_key(text, source_name)
+        cached = response_cache.get(key) if use_cache else None
+        if cached is not None:
+            return cached
+
+        messages = [{"role": "user", "content": self._summary_prompt(text, source_name)}]
+        await asyncio.sleep(self._throttle_delay(messages))
+        async with _async_sem_slot():
+            response = await aclient.messages.create(
+                model=self.MODEL,
+                max_tokens=4096,
+                system=self.SYSTEM_BLOCKS,
+                messages=messages
+            )
+        summary = response.content[0].text
+        if use_cache:
+            response_cache.set(key, summary)
+        return summary
+
+    def _cache_key(self, text: str, source_name: str) -> str:
+        """Response-cache key for one chunk summary."""
+        return response_cache.make_key("sum-part", self.MODEL, self.PROMPT_VERSION, source_name, text)
+
+    @staticmethod
+    def _summary_prompt(text: str, source_name: str) -> str:
+        return f"""Please provide a faithful summary of the following document.
 
 Source: {source_name}
 
@@ -100,54 +377,65 @@ Source: {source_name}
 
 Provide a comprehensive but concise summary that captures all key points, claims, and conclusions from this document."""
 
-        response = self.client.messages.create(
-            model=self.MODEL,
-            max_tokens=4096,
-            system=self.SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_message}]
-        )
-
-        summary = response.content[0].text
-        return summary, None
-
     def _summarize_large_document(
         self,
         text: str,
-        source_name: str
+        source_name: str,
+        chunk_size: Optional[int] = None,
+        use_cache: bool = True
     ) -> Tuple[str, Optional[str]]:
         """
         Summarize a large document by chunking and combining summaries.
 
         Strategy:
         1. Split into chunks
-        2. Summarize each chunk
-        3. Combine chunk summaries into final summary
+        2. Summarize the chunks concurrently
+        3. Combine chunk summaries into final summary (joined locally when
+           they are short enough to read as one summary already)
         """
-        chunks = self._split_into_chunks(text)
-        logger.info(f"Large document split into {len(chunks)} chunks")
-
-        chunk_summaries = []
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Summarizing chunk {i+1}/{len(chunks)}")
-            chunk_summary, error = self._summarize_single(
-                chunk,
-                f"{source_name} (part {i+1}/{len(chunks)})"
-            )
-            if error:
-                return "", f"Error summarizing part {i+1}: {error}"
-            chunk_summaries.append(chunk_summary)
+        chunk_summaries = self._summarize_parts(text, source_name, chunk_size, use_cache)
 
         # If only one chunk after processing, return it directly
         if len(chunk_summaries) == 1:
             return chunk_summaries[0], None
 
+        if sum(len(s) for s in chunk_summaries) < self.COMBINE_MIN_CHARS:
+            logger.info("Chunk summaries are short, joining them without a combine call")
+            return self._join_summaries(chunk_summaries), None
+
         # Combine summaries into final summary
+        response = self._create_message(
+            model=self.MODEL,
+            max_tokens=4096,
+            system=self.SYSTEM_BLOCKS,
+            messages=[{"role": "user", "content": self._combine_prompt(chunk_summaries, source_name)}]
+        )
+
+        return response.content[0].text, None
+
+    def _summarize_parts(
+        self,
+        text: str,
+        source_name: str,
+        chunk_size: Optional[int] = None,
+        use_cache: bool = True
+    ) -> List[str]:
+        """Split a large document and summarize each chunk, in order."""
+        chunks = self._split_into_chunks(text, chunk_size or self.CHUNK_SIZE)
+        logger.info(f"Large document split into {len(chunks)} chunks")
+
+        if self.use_batch_api and len(chunks) >= self.BATCH_MIN_CHUNKS:
+            return self._summarize_chunks_batch(chunks, source_name)
+        return asyncio.run(self._summarize_chunks(chunks, source_name, use_cache))
+
+    @staticmethod
+    def _combine_prompt(chunk_summaries: List[str], source_name: str) -> str:
         combined_text = "\n\n---\n\n".join([
             f"Part {i+1} Summary:\n{s}"
             for i, s in enumerate(chunk_summaries)
         ])
 
-        final_prompt = f"""The following are summaries of different parts of a large document titled "{source_name}".
+        return f"""The following are summaries of different parts of a large document titled "{source_name}".
 Please combine them into a single coherent summary that captures all key points.
 
 {combined_text}
@@ -155,31 +443,178 @@ Please combine them into a single coherent summary that captures all key points.
 Provide a unified summary that flows naturally and captures all important information from all document parts.
 Maintain the faithful summarization approach - no editorializing or commentary."""
 
-        response = self.client.messages.create(
-            model=self.MODEL,
-            max_tokens=4096,
-            system=self.SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": final_prompt}]
+    @staticmethod
+    def _join_summaries(summaries: List[str]) -> str:
+        """
+        Join part summaries in order, dropping repeated paragraphs.
+
+        Neighbouring chunks overlap, so their summaries often restate the same
+        point; paragraphs are compared with whitespace and case normalized.
+        """
+        paragraphs = {}
+        for summary in summaries:
+            for paragraph in _BLANK_LINES_RE.split(summary.strip()):
+                key = _WS_RE.sub(' ', paragraph).strip().lower()
+                if key:
+                    paragraphs.setdefault(key, paragraph.strip())
+        return "\n\n".join(paragraphs.values())
+
+    async def _summarize_chunks(
+        self,
+        chunks: List[str],
+        source_name: str,
+        use_cache: bool = True
+    ) -> List[str]:
+        """
+        Summarize chunks concurrently (at most MAX_CONCURRENCY at once), in order.
+
+        Parts are collected as they complete; the first failure cancels the
+        parts still queued or in flight instead of waiting them out.
+        """
+        sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        summaries: List[Optional[str]] = [None] * len(chunks)
+
+        # The async client's connection pool is bound to this event loop
+        async with anthropic.AsyncAnthropic(api_key=self.api_key) as aclient:
+            async def bounded(i: int, chunk: str) -> Tuple[int, str]:
+                async with sem:
+                    logger.info(f"Summarizing chunk {i+1}/{len(chunks)}")
+                    try:
+                        return i, await self._asummarize_single(
+                            aclient,
+                            chunk,
+                            f"{source_name} (part {i+1}/{len(chunks)})",
+                            use_cache
+                        )
+                    except Exception as e:
+                        logger.error(f"Error summarizing part {i+1}: {e}")
+                        raise
+
+            tasks = [asyncio.create_task(bounded(i, chunk)) for i, chunk in enumerate(chunks)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    i, summary = await next_done
+                    summaries[i] = summary
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+
+        return summaries
+
+    def _summarize_chunks_batch(self, chunks: List[str], source_name: str) -> List[str]:
+        """Summarize chunks in one Message Batch, polling until it ends."""
+        batch = self.client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": f"chunk-{i}",
+                    "params": {
+                        "model": self.MODEL,
+                        "max_tokens": 4096,
+                        "system": self.SYSTEM_BLOCKS,
+                        "messages": [{
+                            "role": "user",
+                            "content": self._summary_prompt(
+                                chunk, f"{source_name} (part {i+1}/{len(chunks)})"
+                            )
+                        }]
+                    }
+                }
+                for i, chunk in enumerate(chunks)
+            ]
+        )
+        logger.info(f"Submitted batch {batch.id} ({len(chunks)} chunks)")
+
+        deadline = time.monotonic() + self.BATCH_TIMEOUT
+        while batch.processing_status != "ended":
+            if time.monotonic() > deadline:
+                self.client.messages.batches.cancel(batch.id)
+                raise TimeoutError(f"Batch {batch.id} did not finish in {self.BATCH_TIMEOUT}s")
+            time.sleep(self.BATCH_POLL_INTERVAL)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        summaries: List[Optional[str]] = [None] * len(chunks)
+        for entry in self.client.messages.batches.results(batch.id):
+            i = int(entry.custom_id.split("-", 1)[1])
+            if entry.result.type != "succeeded":
+                raise RuntimeError(f"Error summarizing part {i+1}: batch request {entry.result.type}")
+            summaries[i] = entry.result.message.content[0].text
+
+        missing = [i + 1 for i, summary in enumerate(summaries) if summary is None]
+        if missing:
+            raise RuntimeError(f"Batch {batch.id} returned no result for parts {missing}")
+        return summaries
+
+    def _create_message(self, **kwargs):
+        """Call messages.create, gated by the per-process rate and concurrency limits."""
+        time.sleep(self._throttle_delay(kwargs["messages"]))
+        with _SEM:
+            return self.client.messages.create(**kwargs)
+
+    def _stream_message(self, **kwargs) -> Iterator[str]:
+        """Streaming _create_message: yields the response text as it arrives."""
+        time.sleep(self._throttle_delay(kwargs["messages"]))
+        with _SEM:
+            with self.client.messages.stream(**kwargs) as stream:
+                yield from stream.text_stream
+
+    def _throttle_delay(self, messages: List[dict]) -> float:
+        """
+        Reserve one request and its estimated input tokens from the rate
+        limits, returning the seconds to wait before sending it.
+        """
+        chars = len(self.SYSTEM_PROMPT) + sum(len(m["content"]) for m in messages)
+        return max(
+            _RPM.reserve(),
+            _INPUT_TPM.reserve(chars / self.DEFAULT_CHARS_PER_TOKEN),
         )
 
-        return response.content[0].text, None
+    def _chars_per_token(self, text: str) -> float:
+        """
+        Measure this text's chars-per-token ratio with the token counting API.
+
+        Only a sample is counted (prose, code and CJK differ 2-6x, but are
+        consistent within a document); falls back to DEFAULT_CHARS_PER_TOKEN.
+        """
+        sample = text[:self.TOKEN_SAMPLE_CHARS]
+        try:
+            with _SEM:
+                count = self.client.messages.count_tokens(
+                    model=self.MODEL,
+                    messages=[{"role": "user", "content": sample}]
+                )
+        except anthropic.APIError as e:
+            logger.warning(f"Token count failed, assuming {self.DEFAULT_CHARS_PER_TOKEN} chars/token: {e}")
+            return self.DEFAULT_CHARS_PER_TOKEN
+
+        ratio = len(sample) / max(count.input_tokens, 1)
+        return min(max(ratio, 1.0), 8.0)
 
-    def _split_into_chunks(self, text: str) -> List[str]:
-        """Split text into overlapping chunks, trying to break at paragraph boundaries."""
+    def _split_into_chunks(self, text: str, chunk_size: int) -> List[str]:
+        """
+        Split text into overlapping chunks, breaking at paragraph boundaries.
+
+        Each chunk ends at the last paragraph break in its second half when
+        there is one, otherwise at chunk_size chars; every step advances by
+        at least chunk_size / 2 - CHUNK_OVERLAP, so splitting always terminates.
+        """
+        breaks = [m.start() for m in _PARAGRAPH_BREAK_RE.finditer(text)]
         chunks = []
         start = 0
 
-        while start < len(text):
-            end = start + self.CHUNK_SIZE
+        while True:
+            end = start + chunk_size
+            if end >= len(text):
+                chunk = text[start:].strip()
+                if chunk:
+                    chunks.append(chunk)
+                return chunks
 
-            # If this isn't the last chunk, try to break at a paragraph boundary
-            if end < len(text):
-                # Look for paragraph break (double newline) near the end of chunk
-                search_start = max(start, end - 2000)
-                break_point = text.rfind('\n\n', search_start, end)
-
-                if break_point > start:
-                    end = break_point
+            # Last paragraph break at or before end, if it isn't too early
+            idx = bisect.bisect_right(breaks, end) - 1
+            if idx >= 0 and breaks[idx] > start + chunk_size // 2:
+                end = breaks[idx]
 
             chunk = text[start:end].strip()
             if chunk:
@@ -188,8 +623,6 @@ Maintain the faithful summarization approach - no editorializing or commentary."
             # Move start forward, with overlap
             start = end - self.CHUNK_OVERLAP
 
-        return chunks
-
     def is_configured(self) -> bool:
         """Check if the summarizer is properly configured."""
         return bool(self.api_key)
@@ -0,0 +1,11 @@
+"""
+Small text helpers shared by the upload and URL extraction endpoints.
+"""
+import re
+
+_WORD_RE = re.compile(r"\S+")
+
+
+def word_count(text: str) -> int:
+    """Count whitespace-delimited words without building a list of them."""
+    return sum(1 for _ in _WORD_RE.finditer(text))
@@ -3,20 +3,134 @@ URL content extraction service.
 Fetches web pages and extracts readable text content.
 """
 import logging
-from typing import Optional, Tuple
+import re
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
 
-import html2text
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from lxml import etree
+from lxml import html as lxml_html
 
 logger = logging.getLogger(__name__)
 
+_WS_RE = re.compile(r'\s+')
+_LINE_EDGE_WS_RE = re.compile(r'[^\S\n]*\n[^\S\n]*')
+_BLANK_RUN_RE = re.compile(r'\n{3,}')
+_PRE_SLOT_RE = re.compile('\x00(\\d+)\x00')  # NUL can't occur in parsed HTML text
+_META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+_BOMS = ((b'\xef\xbb\xbf', 'utf-8'), (b'\xff\xfe', 'utf-16le'), (b'\xfe\xff', 'utf-16be'))
+
+# Elements rendered on their own paragraph / line
+_BLOCK_TAGS = frozenset({
+    'p', 'div', 'section', 'article', 'main', 'blockquote', 'pre',
+    'ul', 'ol', 'dl', 'table', 'tr', 'figure', 'hr',
+})
+_LINE_TAGS = frozenset({'li', 'dt', 'dd'})
+_CELL_TAGS = frozenset({'td', 'th'})
+_HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_EMPHASIS = {'strong': '**', 'b': '**', 'em': '_', 'i': '_'}
+
+_CLEANUP_TAGS = ['script', 'style', 'nav', 'footer', 'header',
+                 'aside', 'form', 'iframe', 'noscript']
+_CLEANUP_CLASSES = ['sidebar', 'advertisement', 'ad', 'ads', 'nav', 'menu',
+                    'comment', 'comments']
+_CLEANUP_IDS = ['sidebar', 'advertisement', 'comments']
+
+
+def _class_test(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+# One compiled expression, so cleanup is a single pass over the tree
+_CLEANUP_XPATH = etree.XPath(
+    '//*[' + ' or '.join(
+        [f'self::{tag}' for tag in _CLEANUP_TAGS]
+        + [_class_test(name) for name in _CLEANUP_CLASSES]
+        + [f'@id="{name}"' for name in _CLEANUP_IDS]
+    ) + ']'
+)
+
+# One keep-alive pool per process, so repeat fetches from the same host reuse
+# the connection (skipping DNS, TCP and TLS setup); httpx.Client is thread-safe
+_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    transport=httpx.HTTPTransport(retries=1),
+)
+
+# lxml serializes concurrent use of one parser, so each request thread gets
+# its own (one per document encoding, which is fixed when a parser is built)
+_parsers = threading.local()
+
+
+def _html_parser(encoding: str) -> lxml_html.HTMLParser:
+    """This thread's HTML parser for an encoding; comments and PIs never reach the tree."""
+    by_encoding = getattr(_parsers, 'by_encoding', None)
+    if by_encoding is None:
+        by_encoding = _parsers.by_encoding = {}
+
+    key = encoding.lower()
+    parser = by_encoding.get(key)
+    if parser is None:
+        try:
+            parser = lxml_html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+        except LookupError:
+            if key == 'utf-8':
+                raise
+            logger.warning(f"Unknown page encoding {encoding!r}, decoding as UTF-8")
+            return _html_parser('utf-8')
+        by_encoding[key] = parser
+    return parser
+
+
+def _sniff_encoding(head: bytes, declared: Optional[str]) -> str:
+    """
+    Encoding to decode a page with, from the start of its body: a BOM, else
+    the Content-Type charset, else a <meta> charset, else UTF-8.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    if declared:
+        return declared
+    match = _META_CHARSET_RE.search(head, 0, 4096)
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+
+def _reset_parser(parser: lxml_html.HTMLParser) -> None:
+    """Discard a half-fed document so the thread's parser can be reused."""
+    try:
+        parser.close()
+    except Exception:
+        pass
+
+
+def _is_ssl_error(exc: BaseException) -> bool:
+    """Whether an httpx connect error was caused by a TLS/certificate failure."""
+    while exc is not None:
+        if isinstance(exc, ssl.SSLError):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _is_link(el) -> bool:
+    """Whether an element is a link worth rendering (not in-page or javascript:)."""
+    if el.tag != 'a':
+        return False
+    href = el.get('href')
+    return bool(href) and not href.startswith(('#', 'javascript:'))
+
 
 class URLExtractor:
     """Extracts readable text content from web URLs."""
 
     TIMEOUT = 30  # seconds
     MAX_CONTENT_SIZE = 10 * 1024 * 1024  # 10MB limit
+    READ_CHUNK_SIZE = 64 * 1024
+    MAX_PARALLEL_FETCHES = 8  # URLs fetched at once by extract_many()
 
     USER_AGENT = (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -43,7 +157,8 @@ class URLExtractor:
             url = 'https://' + url
 
         try:
-            response = requests.get(
+            with _HTTP_CLIENT.stream(
+                'GET',
                 url,
                 timeout=self.TIMEOUT,
                 headers={
@@ -51,97 +166,174 @@ class URLExtractor:
                     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
                     'Accept-Language': 'en-US,en;q=0.5',
                 },
-                allow_redirects=True
-            )
-            response.raise_for_status()
-
-            # Check content size
-            content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > self.MAX_CONTENT_SIZE:
-                return "", "", "Content too large (>10MB)"
-
-            # Check content type
-            content_type = response.headers.get('content-type', '')
-            if 'text/html' not in content_type and 'application/xhtml' not in content_type:
-                return "", "", f"Unsupported content type: {content_type}"
-
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'lxml')
-
-            # Get title
-            title = ""
-            if soup.title and soup.title.string:
-                title = soup.title.string.strip()
-            else:
-                # Try og:title or h1
-                og_title = soup.find('meta', property='og:title')
-                if og_title and og_title.get('content'):
-                    title = og_title['content'].strip()
-                elif soup.h1:
-                    title = soup.h1.get_text().strip()
+                follow_redirects=True
+            ) as response:
+                response.raise_for_status()
+
+                # Check content size and type before reading any of the body
+                content_length = response.headers.get('content-length')
+                if content_length and int(content_length) > self.MAX_CONTENT_SIZE:
+                    return "", "", "Content too large (>10MB)"
+
+                content_type = response.headers.get('content-type', '')
+                if 'text/html' not in content_type and 'application/xhtml' not in content_type:
+                    return "", "", f"Unsupported content type: {content_type}"
+
+                # Parse while downloading: each (decompressed) chunk is fed to
+                # the parser as it arrives, aborting once past the size cap.
+                # The parser is picked on the first chunk, which fixes the
+                # encoding the whole page is decoded with.
+                parser = None
+                root = None
+                try:
+                    received = 0
+                    for chunk in response.iter_bytes(self.READ_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        received += len(chunk)
+                        if received > self.MAX_CONTENT_SIZE:
+                            return "", "", "Content too large (>10MB)"
+                        if parser is None:
+                            parser = _html_parser(_sniff_encoding(chunk, response.charset_encoding))
+                        parser.feed(chunk)
+                    if parser is not None:
+                        root = parser.close()
+                except etree.XMLSyntaxError:
+                    pass  # nothing parseable, e.g. a blank page
+                finally:
+                    if root is None and parser is not None:
+                        _reset_parser(parser)
+                final_url = str(response.url)
+
+            if root is None:
+                return "", url, "No text content could be extracted from the URL"
+
+            # Get title (falls back to og:title, then the first h1)
+            title = (root.findtext('.//title') or "").strip()
+            if not title:
+                og_title = root.xpath('//meta[@property="og:title"]/@content')
+                h1 = root.find('.//h1')
+                if og_title and og_title[0].strip():
+                    title = og_title[0].strip()
+                elif h1 is not None:
+                    title = h1.text_content().strip()
                 else:
                     title = url
 
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'footer', 'header',
-                                'aside', 'form', 'iframe', 'noscript']):
-                element.decompose()
-
-            # Remove common ad/sidebar elements by class/id
-            for selector in ['.sidebar', '.advertisement', '.ad', '.ads',
-                           '#sidebar', '#advertisement', '.nav', '.menu',
-                           '.comment', '.comments', '#comments']:
-                for element in soup.select(selector):
-                    element.decompose()
-
-            # Convert to markdown/text
-            h = html2text.HTML2Text()
-            h.ignore_links = False
-            h.ignore_images = True
-            h.ignore_emphasis = False
-            h.body_width = 0  # Don't wrap lines
-            h.skip_internal_links = True
-            h.inline_links = True
-
-            text = h.handle(str(soup))
-
-            # Clean up excessive whitespace
-            lines = text.split('\n')
-            cleaned_lines = []
-            prev_empty = False
-
-            for line in lines:
-                line = line.rstrip()
-                is_empty = not line.strip()
-
-                if is_empty:
-                    if not prev_empty:
-                        cleaned_lines.append('')
-                    prev_empty = True
-                else:
-                    cleaned_lines.append(line)
-                    prev_empty = False
+            # Remove unwanted elements (chrome, scripts, ads, sidebars, comments)
+            for element in _CLEANUP_XPATH(root):
+                element.drop_tree()
 
-            text = '\n'.join(cleaned_lines).strip()
+            # Convert to markdown-style text in one walk of the tree
+            text = self._render_text(root, final_url)
 
             if not text:
                 return "", title, "No text content could be extracted from the URL"
 
             return text, title, None
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return "", "", "Request timed out after 30 seconds"
-        except requests.exceptions.TooManyRedirects:
+        except httpx.TooManyRedirects:
             return "", "", "Too many redirects"
-        except requests.exceptions.SSLError:
-            return "", "", "SSL certificate error"
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError as e:
+            if _is_ssl_error(e):
+                return "", "", "SSL certificate error"
             return "", "", "Could not connect to the server"
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             return "", "", f"HTTP error: {e.response.status_code}"
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching URL {url}: {e}")
             return "", "", f"Failed to fetch URL: {str(e)}"
         except Exception as e:
             logger.error(f"Error processing URL {url}: {e}")
             return "", "", f"Failed to process content: {str(e)}"
+
+    def extract_many(self, urls: List[str]) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Extract several URLs concurrently (at most MAX_PARALLEL_FETCHES at once).
+
+        Returns one extract() result per URL, in the order given; a failed
+        URL reports its own error without affecting the others.
+        """
+        if len(urls) <= 1:
+            return [self.extract(url) for url in urls]
+
+        # Threads, not processes: the work is mostly waiting on the network,
+        # and lxml releases the GIL while parsing
+        with ThreadPoolExecutor(max_workers=min(self.MAX_PARALLEL_FETCHES, len(urls))) as pool:
+            return list(pool.map(self.extract, urls))
+
+    @staticmethod
+    def _render_text(root, base_url: str) -> str:
+        """
+        Render the page body as markdown-style text: headings, list items,
+        emphasis, " | "-separated table cells and inline [text](href) links
+        (resolved against base_url, in-page #fragment links skipped); images
+        are dropped. <pre> blocks keep their whitespace verbatim.
+        """
+        body = root.find('body')
+        out = []
+        pre_blocks = []  # verbatim <pre> texts, held out of whitespace cleanup
+        pre_depth = 0
+        pre_start = 0
+
+        for event, el in etree.iterwalk(body if body is not None else root, events=('start', 'end')):
+            tag = el.tag if isinstance(el.tag, str) else None  # None for comments / PIs
+
+            if event == 'start':
+                if tag == 'pre':
+                    if not pre_depth:
+                        out.append('\n\n')
+                        pre_start = len(out)
+                    pre_depth += 1
+                elif pre_depth:
+                    # Markup inside <pre> (e.g. <code>, highlighting spans) adds nothing
+                    if tag == 'br':
+                        out.append('\n')
+                elif tag in _HEADINGS:
+                    out.append('\n\n' + '#' * _HEADINGS[tag] + ' ')
+                elif tag in _LINE_TAGS:
+                    out.append('\n* ' if tag == 'li' else '\n')
+                elif tag in _CELL_TAGS:
+                    if el.getprevious() is not None:
+                        out.append(' | ')
+                elif tag == 'br':
+                    out.append('\n')
+                elif tag in _BLOCK_TAGS:
+                    out.append('\n\n')
+                elif tag in _EMPHASIS:
+                    out.append(_EMPHASIS[tag])
+                elif _is_link(el):
+                    out.append('[')
+
+                if tag is not None and el.text:
+                    out.append(el.text if pre_depth else _WS_RE.sub(' ', el.text))
+                continue
+
+            if tag == 'pre':
+                pre_depth -= 1
+                if not pre_depth:
+                    block = ''.join(out[pre_start:]).strip('\n')
+                    del out[pre_start:]
+                    pre_blocks.append('\n'.join(line.rstrip() for line in block.split('\n')))
+                    out.append(f'\x00{len(pre_blocks) - 1}\x00\n\n')
+            elif pre_depth:
+                pass
+            elif tag in _HEADINGS or tag in _BLOCK_TAGS:
+                out.append('\n\n')
+            elif tag in _EMPHASIS:
+                out.append(_EMPHASIS[tag])
+            elif _is_link(el):
+                out.append(f']({urljoin(base_url, el.get("href"))})')
+
+            if el.tail:
+                out.append(el.tail if pre_depth else _WS_RE.sub(' ', el.tail))
+
+        # Clean up excessive whitespace: trim every line, then keep at most
+        # one blank line between paragraphs
+        text = _LINE_EDGE_WS_RE.sub('\n', ''.join(out))
+        text = _BLANK_RUN_RE.sub('\n\n', text).strip()
+        if pre_blocks:
+            text = _PRE_SLOT_RE.sub(lambda m: pre_blocks[int(m.group(1))], text)
+        return text
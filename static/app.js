@@ -136,7 +136,7 @@ function setupForms() {
         };
 
         try {
-            const res = await fetch('/api/documents', {
+            const res = await fetch('/api/documents?sync=1', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ content, metadata })
@@ -144,7 +144,9 @@ function setupForms() {
 
             const data = await res.json();
             if (data.success) {
-                alert('Document added successfully!');
+                alert(data.duplicate
+                    ? `This content is already stored as ${data.id}; nothing was added and the new metadata was not applied.`
+                    : 'Document added successfully!');
                 e.target.reset();
                 loadStats();
                 loadDocuments();
@@ -625,7 +627,7 @@ async function handleApprove() {
     };
 
     try {
-        const response = await fetch('/api/documents', {
+        const response = await fetch('/api/documents?sync=1', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ content, metadata })
@@ -636,7 +638,9 @@ async function handleApprove() {
         if (data.success) {
             const docIdEl = document.getElementById('added-doc-id');
             if (docIdEl) {
-                docIdEl.textContent = `Document ID: ${data.id}`;
+                docIdEl.textContent = data.duplicate
+                    ? `Already in the knowledge base as ${data.id} (not added again)`
+                    : `Document ID: ${data.id}`;
             }
             loadStats();
             clearStatus(statusEl);
@@ -824,10 +828,9 @@ async function sendDialogueMessage() {
             addAssistantMessage(data.reply);
             dialogueState.chatHistory.push({ role: 'assistant', content: data.reply });
 
-            // Check for new consensus point
-            if (data.consensus_point) {
-                addConsensusPoint(data.consensus_point);
-            }
+            // Check for new consensus points (older responses only carry one)
+            const points = data.consensus_points || (data.consensus_point ? [data.consensus_point] : []);
+            points.forEach(addConsensusPoint);
         } else {
             addSystemMessage('Error: ' + (data.error || 'Unknown error'));
         }
@@ -1066,7 +1069,7 @@ async function commitArticle() {
     };
 
     try {
-        const res = await fetch('/api/documents', {
+        const res = await fetch('/api/documents?sync=1', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({